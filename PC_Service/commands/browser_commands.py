@@ -2,21 +2,124 @@
 Browser Commands for ESP32 CYD PC Service
 Handles browser operations and web application launching
 """
+import functools
+import logging
 import os
-import platform
+import re
+import shutil
 import webbrowser
+from types import MappingProxyType
+from typing import Optional
 from .command_executor import AsyncProcessCommandExecutor, CommandResult
+from .platform_info import SYSTEM
+
+logger = logging.getLogger(__name__)
+
+# URLs that already carry a scheme are opened as-is
+_URL_SCHEME_RE = re.compile(r"^(?:https?|file)://")
+
+
+# Executable names probed on PATH for browsers launched by path
+_BROWSER_CANDIDATES = {
+    "windows": {
+        "chrome": ("chrome",),
+        "edge": ("msedge",),
+        "firefox": ("firefox",)
+    },
+    "linux": {
+        "chrome": ("google-chrome", "chromium-browser", "chromium"),
+        "firefox": ("firefox",)
+    }
+}
+
+# Standard install locations checked when a browser is not on PATH, as
+# (environment variable, path below it); Chrome and Firefox are rarely on
+# PATH on Windows
+_BROWSER_INSTALL_PATHS = {
+    "windows": {
+        "chrome": (
+            ("PROGRAMFILES", r"Google\Chrome\Application\chrome.exe"),
+            ("PROGRAMFILES(X86)", r"Google\Chrome\Application\chrome.exe"),
+            ("LOCALAPPDATA", r"Google\Chrome\Application\chrome.exe")
+        ),
+        "edge": (
+            ("PROGRAMFILES(X86)", r"Microsoft\Edge\Application\msedge.exe"),
+            ("PROGRAMFILES", r"Microsoft\Edge\Application\msedge.exe")
+        ),
+        "firefox": (
+            ("PROGRAMFILES", r"Mozilla Firefox\firefox.exe"),
+            ("PROGRAMFILES(X86)", r"Mozilla Firefox\firefox.exe")
+        )
+    }
+}
+
+
+# Registry key where installers register executables for ShellExecute;
+# this is how cmd's "start chrome" finds browsers that are not on PATH
+_APP_PATHS_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths"
+
+
+def _find_app_path(executable: str) -> Optional[str]:
+    """Look up an executable's App Paths registration (Windows)"""
+    try:
+        import winreg
+    except ImportError:
+        return None
+    for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+        try:
+            path = winreg.QueryValue(root, f"{_APP_PATHS_KEY}\\{executable}").strip('"')
+        except OSError:
+            continue
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+def _find_installed_browser(system: str, browser: str) -> Optional[str]:
+    """Return the first standard install location that exists, if any"""
+    for env_var, relative_path in _BROWSER_INSTALL_PATHS.get(system, {}).get(browser, ()):
+        base = os.environ.get(env_var)
+        if base:
+            path = os.path.join(base, relative_path)
+            if os.path.isfile(path):
+                return path
+    if system == "windows":
+        for candidate in _BROWSER_CANDIDATES[system].get(browser, ()):
+            path = _find_app_path(candidate + ".exe")
+            if path:
+                return path
+    return None
 
 
 class BrowserCommands:
     """Handles browser-related commands"""
     
     def __init__(self):
-        self.system = platform.system().lower()
+        self.system = SYSTEM
+        # Platform branches in _setup_executors fill in the supported ones
+        self.chrome_executor = None
+        self.edge_executor = None
+        self.firefox_executor = None
+        self.safari_executor = None
         self._setup_executors()
     
     def _setup_executors(self):
         """Setup browser executors based on the operating system"""
+        # Browsers with a resolvable executable are launched directly by path.
+        # Lookups happen once here, so opening a browser later costs no stat
+        # calls and no shell.
+        self._browser_paths = {}
+        for browser, candidates in _BROWSER_CANDIDATES.get(self.system, {}).items():
+            for candidate in candidates:
+                path = shutil.which(candidate)
+                if path:
+                    self._browser_paths[browser] = path
+                    break
+            else:
+                path = _find_installed_browser(self.system, browser)
+                if path:
+                    self._browser_paths[browser] = path
+        
         if self.system == "windows":
             self.chrome_executor = AsyncProcessCommandExecutor(
                 "Chrome",
@@ -30,44 +133,82 @@ class BrowserCommands:
                 "Firefox",
                 "start firefox"
             )
+            # Argument lists keep URLs away from cmd, which would expand
+            # %VAR% and act on & and ^ even inside quotes. Installed browsers
+            # were resolved above and launched by path; these only run when
+            # a browser was not found anywhere
+            self._url_templates = {
+                "chrome": ["chrome.exe"],
+                "edge": ["msedge.exe"],
+                "firefox": ["firefox.exe"]
+            }
         elif self.system == "darwin":  # macOS
             self.chrome_executor = AsyncProcessCommandExecutor(
                 "Chrome",
-                "open -a 'Google Chrome'"
+                ["open", "-a", "Google Chrome"],
+                shell=False
             )
             self.safari_executor = AsyncProcessCommandExecutor(
                 "Safari",
-                "open -a Safari"
+                ["open", "-a", "Safari"],
+                shell=False
             )
             self.firefox_executor = AsyncProcessCommandExecutor(
                 "Firefox",
-                "open -a Firefox"
+                ["open", "-a", "Firefox"],
+                shell=False
             )
+            self._url_templates = {
+                "chrome": ["open", "-a", "Google Chrome"],
+                "safari": ["open", "-a", "Safari"],
+                "firefox": ["open", "-a", "Firefox"]
+            }
         elif self.system == "linux":
-            self.chrome_executor = AsyncProcessCommandExecutor(
-                "Chrome",
-                "google-chrome || chromium-browser || chromium"
-            )
-            self.firefox_executor = AsyncProcessCommandExecutor(
-                "Firefox",
-                "firefox"
-            )
+            # Binaries were resolved above; launch them directly without a shell
+            if "chrome" in self._browser_paths:
+                self.chrome_executor = AsyncProcessCommandExecutor(
+                    "Chrome",
+                    [self._browser_paths["chrome"]],
+                    shell=False
+                )
+            if "firefox" in self._browser_paths:
+                self.firefox_executor = AsyncProcessCommandExecutor(
+                    "Firefox",
+                    [self._browser_paths["firefox"]],
+                    shell=False
+                )
+            self._url_templates = {
+                "chrome": [self._browser_paths.get("chrome", "google-chrome")],
+                "firefox": [self._browser_paths.get("firefox", "firefox")]
+            }
         else:
             # Fallback using webbrowser module
             self.default_executor = None
+            self._url_templates = {}
+    
+    def _launch(self, browser: str, url: Optional[str] = None) -> CommandResult:
+        """Start a browser that was resolved to an executable at setup"""
+        # Chrome, Edge and Firefox pass the URL to an instance that is
+        # already running, which opens it as a new tab
+        argv = [self._browser_paths[browser]]
+        if url:
+            argv.append(url)
+        return AsyncProcessCommandExecutor(browser, argv, shell=False).safe_execute()
     
     def open_browser(self, browser_name: str = "default") -> CommandResult:
         """Open specified browser or default browser"""
         try:
-            if browser_name.lower() == "default":
+            browser = browser_name.lower()
+            
+            if browser == "default":
                 return self._open_default_browser()
-            elif browser_name.lower() == "chrome":
+            elif browser == "chrome":
                 return self._open_chrome()
-            elif browser_name.lower() == "firefox":
+            elif browser == "firefox":
                 return self._open_firefox()
-            elif browser_name.lower() == "edge":
+            elif browser == "edge":
                 return self._open_edge()
-            elif browser_name.lower() == "safari":
+            elif browser == "safari":
                 return self._open_safari()
             else:
                 return CommandResult(False, f"Unknown browser: {browser_name}",
@@ -79,50 +220,31 @@ class BrowserCommands:
     def open_url(self, url: str, browser_name: str = "default") -> CommandResult:
         """Open a specific URL in the specified browser"""
         try:
+            browser = browser_name.lower()
+            
             # Validate URL format
-            if not url.startswith(('http://', 'https://', 'file://')):
-                if not url.startswith('www.'):
-                    url = 'https://www.' + url
-                else:
-                    url = 'https://' + url
+            if not _URL_SCHEME_RE.match(url):
+                url = ('https://' if url.startswith('www.') else 'https://www.') + url
             
-            if browser_name.lower() == "default":
+            if browser == "default":
                 # Use Python's webbrowser module for default browser
                 webbrowser.open(url)
                 return CommandResult(True, f"Opened {url} in default browser")
+            elif browser in self._browser_paths:
+                return self._launch(browser, url)
+            elif not self._url_templates:
+                # Fallback to default browser
+                webbrowser.open(url)
+                return CommandResult(True, f"Opened {url} in default browser")
             else:
                 # Open specific browser with URL
-                if self.system == "windows":
-                    if browser_name.lower() == "chrome":
-                        command = f'start chrome "{url}"'
-                    elif browser_name.lower() == "edge":
-                        command = f'start msedge "{url}"'
-                    elif browser_name.lower() == "firefox":
-                        command = f'start firefox "{url}"'
-                    else:
-                        return CommandResult(False, f"Unsupported browser: {browser_name}")
-                elif self.system == "darwin":
-                    if browser_name.lower() == "chrome":
-                        command = f'open -a "Google Chrome" "{url}"'
-                    elif browser_name.lower() == "safari":
-                        command = f'open -a Safari "{url}"'
-                    elif browser_name.lower() == "firefox":
-                        command = f'open -a Firefox "{url}"'
-                    else:
-                        return CommandResult(False, f"Unsupported browser: {browser_name}")
-                elif self.system == "linux":
-                    if browser_name.lower() == "chrome":
-                        command = f'google-chrome "{url}" || chromium-browser "{url}" || chromium "{url}"'
-                    elif browser_name.lower() == "firefox":
-                        command = f'firefox "{url}"'
-                    else:
-                        return CommandResult(False, f"Unsupported browser: {browser_name}")
-                else:
-                    # Fallback to default browser
-                    webbrowser.open(url)
-                    return CommandResult(True, f"Opened {url} in default browser")
-                
-                executor = AsyncProcessCommandExecutor(f"{browser_name} with URL", command)
+                template = self._url_templates.get(browser)
+                if template is None:
+                    return CommandResult(False, f"Unsupported browser: {browser_name}")
+                # Argument list: the URL is passed verbatim, no shell involved
+                executor = AsyncProcessCommandExecutor(
+                    f"{browser_name} with URL", template + [url], shell=False
+                )
                 return executor.safe_execute()
                 
         except Exception as e:
@@ -139,7 +261,9 @@ class BrowserCommands:
     
     def _open_chrome(self) -> CommandResult:
         """Open Google Chrome"""
-        if hasattr(self, 'chrome_executor'):
+        if "chrome" in self._browser_paths:
+            return self._launch("chrome")
+        elif self.chrome_executor is not None:
             return self.chrome_executor.safe_execute()
         else:
             return CommandResult(False, "Chrome not available", 
@@ -147,7 +271,9 @@ class BrowserCommands:
     
     def _open_firefox(self) -> CommandResult:
         """Open Firefox"""
-        if hasattr(self, 'firefox_executor'):
+        if "firefox" in self._browser_paths:
+            return self._launch("firefox")
+        elif self.firefox_executor is not None:
             return self.firefox_executor.safe_execute()
         else:
             return CommandResult(False, "Firefox not available",
@@ -155,7 +281,9 @@ class BrowserCommands:
     
     def _open_edge(self) -> CommandResult:
         """Open Microsoft Edge"""
-        if hasattr(self, 'edge_executor'):
+        if "edge" in self._browser_paths:
+            return self._launch("edge")
+        elif self.edge_executor is not None:
             return self.edge_executor.safe_execute()
         else:
             return CommandResult(False, "Edge not available",
@@ -163,7 +291,7 @@ class BrowserCommands:
     
     def _open_safari(self) -> CommandResult:
         """Open Safari"""
-        if hasattr(self, 'safari_executor'):
+        if self.safari_executor is not None:
             return self.safari_executor.safe_execute()
         else:
             return CommandResult(False, "Safari not available",
@@ -180,10 +308,17 @@ class BrowserCommands:
         # Try to open Google as test page
         return self.open_url(test_urls[0])
     
-    def get_available_browsers(self) -> list:
-        """Get list of available browsers for the current system"""
-        browsers = []
-        
+    def prewarm(self, browser_name: str = "chrome") -> CommandResult:
+        """Launch a browser ahead of the first request"""
+        browser_name = browser_name.lower()
+        if browser_name not in self._browser_paths:
+            return CommandResult(False, f"Cannot prewarm {browser_name}",
+                               f"{browser_name} executable not found on {self.system}")
+        return self._launch(browser_name)
+    
+    @functools.cached_property
+    def available_browsers(self) -> tuple:
+        """Read-only list of available browsers for the current system"""
         if self.system == "windows":
             browsers = [
                 {"name": "Chrome", "command": "chrome"},
@@ -209,28 +344,39 @@ class BrowserCommands:
                 {"name": "Default", "command": "default"}
             ]
         
-        return browsers
+        return tuple(MappingProxyType(browser) for browser in browsers)
+    
+    def get_available_browsers(self) -> tuple:
+        """Get list of available browsers for the current system (cached)"""
+        return self.available_browsers
 
 
-# Global instance
-browser_commands = BrowserCommands()
+@functools.cache
+def get_browser_commands() -> BrowserCommands:
+    """Get the shared BrowserCommands instance, creating it on first use"""
+    return BrowserCommands()
 
 
 def open_browser(browser_name: str = "default") -> CommandResult:
     """Convenience function to open browser"""
-    return browser_commands.open_browser(browser_name)
+    return get_browser_commands().open_browser(browser_name)
 
 
 def open_chrome() -> CommandResult:
     """Convenience function to open Chrome"""
-    return browser_commands.open_browser("chrome")
+    return get_browser_commands().open_browser("chrome")
+
+
+def prewarm_browsers() -> CommandResult:
+    """Convenience function to prewarm the browser"""
+    return get_browser_commands().prewarm("chrome")
 
 
 def open_test_page() -> CommandResult:
     """Convenience function to open test page"""
-    return browser_commands.open_test_page()
+    return get_browser_commands().open_test_page()
 
 
 def open_url(url: str, browser_name: str = "default") -> CommandResult:
     """Convenience function to open URL"""
-    return browser_commands.open_url(url, browser_name)
+    return get_browser_commands().open_url(url, browser_name)
@@ -2,12 +2,38 @@
 Base Command Executor for ESP32 CYD PC Service
 Provides framework for safe command execution with validation
 """
+import heapq
+import logging
+import shutil
 import subprocess
 import threading
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Callable
-from config import COMMAND_TIMEOUT
+from typing import Dict, Any, Optional, Callable, List, Union
+from config import COMMAND_TIMEOUT, LAUNCH_CHECK_TIMEOUT
+from .platform_info import IS_WINDOWS
+
+logger = logging.getLogger(__name__)
+
+
+# Fast spawn settings for fire-and-forget launches. Python creates its own
+# descriptors non-inheritable, so the close_fds scan is pure overhead; without
+# it CPython uses posix_spawn on POSIX when the executable path is absolute.
+if IS_WINDOWS:
+    _SPAWN_KWARGS = {"close_fds": False,
+                     "creationflags": subprocess.DETACHED_PROCESS}
+else:
+    _SPAWN_KWARGS = {"close_fds": False}
+
+
+def _resolve_argv(command: Union[str, List[str]], shell: bool) -> Union[str, List[str]]:
+    """Resolve the program of an argv command to an absolute path"""
+    if shell or not isinstance(command, list) or not command:
+        # Shell commands (including "a || b" fallback chains) already run
+        # through an absolute /bin/sh or cmd.exe
+        return command
+    path = shutil.which(command[0])
+    return [path] + command[1:] if path else command
 
 
 class CommandResult:
@@ -85,7 +111,7 @@ class BaseCommandExecutor(ABC):
             
         except Exception as e:
             error_msg = f"Unexpected error executing {self.name}: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             return CommandResult(False, "Execution error", error_msg)
     
     def get_stats(self) -> Dict[str, Any]:
@@ -100,7 +126,7 @@ class BaseCommandExecutor(ABC):
 class ProcessCommandExecutor(BaseCommandExecutor):
     """Command executor that runs system processes"""
     
-    def __init__(self, name: str, command: str, shell: bool = True):
+    def __init__(self, name: str, command: Union[str, List[str]], shell: bool = True):
         super().__init__(name)
         self.command = command
         self.shell = shell
@@ -108,7 +134,7 @@ class ProcessCommandExecutor(BaseCommandExecutor):
     def execute(self, **kwargs) -> CommandResult:
         """Execute a system process"""
         try:
-            print(f"Executing command: {self.command}")
+            logger.debug("Executing command: %s", self.command)
             
             # Start the process
             process = subprocess.Popen(
@@ -122,15 +148,7 @@ class ProcessCommandExecutor(BaseCommandExecutor):
             # Wait for completion with timeout
             try:
                 stdout, stderr = process.communicate(timeout=self.timeout)
-                return_code = process.returncode
-                
-                if return_code == 0:
-                    return CommandResult(True, f"{self.name} executed successfully",
-                                       stdout.strip() if stdout else None, return_code)
-                else:
-                    return CommandResult(False, f"{self.name} failed",
-                                       stderr.strip() if stderr else f"Return code: {return_code}",
-                                       return_code)
+                return self._build_result(process.returncode, stdout, stderr)
                     
             except subprocess.TimeoutExpired:
                 process.kill()
@@ -140,39 +158,56 @@ class ProcessCommandExecutor(BaseCommandExecutor):
         except Exception as e:
             return CommandResult(False, f"Failed to execute {self.name}",
                                f"Error: {str(e)}")
+    
+    def _build_result(self, return_code: int, stdout: str, stderr: str) -> CommandResult:
+        """Build the result for a finished process"""
+        if return_code == 0:
+            return CommandResult(True, f"{self.name} executed successfully",
+                               stdout.strip() if stdout else None, return_code)
+        else:
+            return CommandResult(False, f"{self.name} failed",
+                               stderr.strip() if stderr else f"Return code: {return_code}",
+                               return_code)
 
 
 class AsyncProcessCommandExecutor(BaseCommandExecutor):
     """Command executor that starts processes asynchronously (fire and forget)"""
     
-    def __init__(self, name: str, command: str, shell: bool = True):
+    def __init__(self, name: str, command: Union[str, List[str]], shell: bool = True):
         super().__init__(name)
-        self.command = command
+        self.command = _resolve_argv(command, shell)
         self.shell = shell
     
     def execute(self, **kwargs) -> CommandResult:
         """Execute a system process asynchronously"""
         try:
-            print(f"Starting async command: {self.command}")
+            logger.debug("Starting async command: %s", self.command)
             
             # Start the process without waiting
             process = subprocess.Popen(
                 self.command,
                 shell=self.shell,
                 stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+                stderr=subprocess.DEVNULL,
+                **_SPAWN_KWARGS
             )
             
-            # Give it a moment to start
-            time.sleep(0.5)
-            
-            # Check if it's still running (successful start)
-            if process.poll() is None:
+            # Bounded wait for an early exit: a shell running a missing
+            # program, or "open -a" with an unknown app, is still alive right
+            # after Popen but fails within moments. Launchers such as "start"
+            # or "open" exit with 0 once they have handed off, which ends the
+            # wait early; programs that keep running time out and count as
+            # started.
+            try:
+                return_code = process.wait(timeout=LAUNCH_CHECK_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                return_code = None
+            if return_code is None or return_code == 0:
                 return CommandResult(True, f"{self.name} started successfully",
                                    f"Process started with PID: {process.pid}")
             else:
                 return CommandResult(False, f"{self.name} failed to start",
-                                   f"Process exited immediately with code: {process.returncode}")
+                                   f"Process exited immediately with code: {return_code}")
                 
         except Exception as e:
             return CommandResult(False, f"Failed to start {self.name}",
@@ -188,17 +223,27 @@ class ConfirmationCommandExecutor(BaseCommandExecutor):
         self.command_executor = command_executor
         self.confirmation_timeout = confirmation_timeout
         self.pending_confirmations = {}
+        # (expiry time, confirmation ID) ordered by expiry for cheap cleanup
+        self._expiry_heap = []
+        self._lock = threading.Lock()
+        # Fires when the earliest pending confirmation expires
+        self._expiry_timer: Optional[threading.Timer] = None
     
     def execute(self, **kwargs) -> CommandResult:
         """Execute command with confirmation requirement"""
         confirmation_id = f"{self.name}_{int(time.time())}"
+        expires = time.monotonic() + self.confirmation_timeout
         
-        # Store the pending confirmation
-        self.pending_confirmations[confirmation_id] = {
-            "executor": self.command_executor,
-            "kwargs": kwargs,
-            "timestamp": time.time()
-        }
+        with self._lock:
+            # Store the pending confirmation
+            self.pending_confirmations[confirmation_id] = {
+                "executor": self.command_executor,
+                "kwargs": kwargs,
+                "expires": expires
+            }
+            heapq.heappush(self._expiry_heap, (expires, confirmation_id))
+            if self._expiry_timer is None:
+                self._schedule_expiry()
         
         return CommandResult(False, f"{self.name} requires confirmation",
                            f"Confirmation ID: {confirmation_id}. "
@@ -206,35 +251,54 @@ class ConfirmationCommandExecutor(BaseCommandExecutor):
     
     def confirm_execution(self, confirmation_id: str) -> CommandResult:
         """Confirm and execute the pending command"""
-        if confirmation_id not in self.pending_confirmations:
+        with self._lock:
+            pending = self.pending_confirmations.pop(confirmation_id, None)
+        
+        if pending is None:
             return CommandResult(False, "Invalid confirmation ID",
                                "Confirmation ID not found or expired")
         
-        pending = self.pending_confirmations[confirmation_id]
-        
         # Check timeout
-        if time.time() - pending["timestamp"] > self.confirmation_timeout:
-            del self.pending_confirmations[confirmation_id]
+        if time.monotonic() > pending["expires"]:
             return CommandResult(False, "Confirmation timeout",
                                "Confirmation window has expired")
         
         # Execute the command
         try:
-            result = pending["executor"].safe_execute(**pending["kwargs"])
-            del self.pending_confirmations[confirmation_id]
-            return result
+            return pending["executor"].safe_execute(**pending["kwargs"])
         except Exception as e:
-            del self.pending_confirmations[confirmation_id]
             return CommandResult(False, "Execution error after confirmation",
                                f"Error: {str(e)}")
     
     def cleanup_expired_confirmations(self):
         """Remove expired confirmations"""
-        current_time = time.time()
-        expired_ids = [
-            conf_id for conf_id, pending in self.pending_confirmations.items()
-            if current_time - pending["timestamp"] > self.confirmation_timeout
-        ]
+        with self._lock:
+            self._expire_due()
+    
+    def _schedule_expiry(self):
+        """Arm the timer for the earliest pending expiry (lock must be held)"""
+        if not self._expiry_heap:
+            self._expiry_timer = None
+            return
+        delay = max(0.0, self._expiry_heap[0][0] - time.monotonic())
+        self._expiry_timer = threading.Timer(delay, self._on_expiry_timer)
+        self._expiry_timer.daemon = True
+        self._expiry_timer.start()
+    
+    def _on_expiry_timer(self):
+        """Drop expired confirmations and re-arm for the next one"""
+        with self._lock:
+            self._expire_due()
+            self._schedule_expiry()
+    
+    def _expire_due(self):
+        """Pop every expired heap entry (lock must be held)"""
+        current_time = time.monotonic()
         
-        for conf_id in expired_ids:
-            del self.pending_confirmations[conf_id]
+        # Only the expired entries at the front of the heap are visited
+        while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+            expiry, conf_id = heapq.heappop(self._expiry_heap)
+            pending = self.pending_confirmations.get(conf_id)
+            # A re-issued ID may carry a later expiry than this heap entry
+            if pending and pending["expires"] <= expiry:
+                del self.pending_confirmations[conf_id]
@@ -0,0 +1,14 @@
+"""
+Operating system detection shared by the command modules
+"""
+import sys
+
+# Derived from sys.platform, which is fixed at interpreter build time,
+# so no uname call is needed to detect the OS
+IS_WINDOWS = sys.platform.startswith("win")
+IS_DARWIN = sys.platform == "darwin"
+IS_LINUX = sys.platform.startswith("linux")
+
+# Key used by the per-OS command tables
+SYSTEM = ("windows" if IS_WINDOWS else "darwin" if IS_DARWIN
+          else "linux" if IS_LINUX else sys.platform)
@@ -2,11 +2,104 @@
 Sound Commands for ESP32 CYD PC Service
 Handles playing sound files in the background
 """
+import atexit
+import logging
 import os
 import subprocess
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from .command_executor import CommandResult
 
+logger = logging.getLogger(__name__)
+
+try:
+    import ctypes
+    _winmm = ctypes.windll.winmm
+except (ImportError, AttributeError, OSError):
+    _winmm = None
+
+# Sound files are scanned once; the bundled set does not change at runtime
+_SOUND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sound")
+_SOUNDS = {
+    os.path.splitext(file_name)[0].lower(): os.path.join(_SOUND_DIR, file_name)
+    for file_name in (os.listdir(_SOUND_DIR) if os.path.isdir(_SOUND_DIR) else ())
+    if file_name.lower().endswith(".mp3")
+}
+
+# Shared workers for starting playback; caps concurrent launches
+_SOUND_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="snd")
+atexit.register(_SOUND_POOL.shutdown, wait=False)
+
+# MCI aliases that are already open and can be replayed from the start
+_mci_aliases = set()
+_mci_lock = threading.Lock()
+
+
+def _mci_open(alias: str, sound_file: str) -> bool:
+    """Open (and decode) a sound once under an MCI alias; caller holds _mci_lock"""
+    if alias in _mci_aliases:
+        return True
+    if _winmm.mciSendStringW(f'open "{sound_file}" type mpegvideo alias {alias}',
+                             None, 0, None) != 0:
+        return False
+    _mci_aliases.add(alias)
+    return True
+
+
+def _mci_play(sound_name: str, sound_file: str) -> bool:
+    """Start playback through the Windows MCI API; returns False on MCI error"""
+    alias = f"cyd_{sound_name}"
+    
+    with _mci_lock:
+        if not _mci_open(alias, sound_file):
+            return False
+        
+        # Without "wait" MCI returns immediately and plays asynchronously;
+        # "from 0" rewinds a device that has already played
+        return _winmm.mciSendStringW(f"play {alias} from 0", None, 0, None) == 0
+
+
+def preload_sounds() -> int:
+    """
+    Open every bundled sound up front so the first play of each one
+    does not pay for file I/O and MP3 decoding. Returns the number loaded.
+    """
+    if _winmm is None:
+        return 0
+    
+    loaded = 0
+    with _mci_lock:
+        for name, sound_file in _SOUNDS.items():
+            if _mci_open(f"cyd_{name}", sound_file):
+                loaded += 1
+    return loaded
+
+
+def _powershell_play(sound_file: str):
+    """Fallback playback through a detached PowerShell MediaPlayer"""
+    subprocess.Popen([
+        "powershell", "-Command", 
+        f"Add-Type -AssemblyName presentationCore; "
+        f"$mediaPlayer = New-Object system.windows.media.mediaplayer; "
+        f"$mediaPlayer.open([uri]'{sound_file}'); "
+        f"$mediaPlayer.Play(); "
+        f"Start-Sleep -Seconds 1; "
+        f"while($mediaPlayer.NaturalDuration.HasTimeSpan -eq $false) {{ Start-Sleep -Milliseconds 100 }}; "
+        f"$duration = $mediaPlayer.NaturalDuration.TimeSpan.TotalSeconds; "
+        f"Start-Sleep -Seconds $duration; "
+        f"$mediaPlayer.Stop(); "
+        f"$mediaPlayer.Close()"
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _start_playback(name: str, sound_file: str):
+    """Start playback via MCI, falling back to PowerShell"""
+    try:
+        if _winmm is None or not _mci_play(name, sound_file):
+            _powershell_play(sound_file)
+    except Exception as e:
+        logger.error("Error playing sound in background: %s", e)
+
 
 def play_sound(sound_name: str) -> CommandResult:
     """
@@ -19,37 +112,14 @@ def play_sound(sound_name: str) -> CommandResult:
         CommandResult with success status and message
     """
     try:
-        # Get the sound file path
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        sound_file = os.path.join(base_dir, "sound", f"{sound_name.lower()}.mp3")
-        
-        # Check if sound file exists
-        if not os.path.exists(sound_file):
-            return CommandResult(False, f"Sound file not found: {sound_file}")
-        
-        # Play sound in background thread to avoid blocking
-        def play_in_background():
-            try:
-                # Use Windows Media Player for background playback
-                subprocess.run([
-                    "powershell", "-Command", 
-                    f"Add-Type -AssemblyName presentationCore; "
-                    f"$mediaPlayer = New-Object system.windows.media.mediaplayer; "
-                    f"$mediaPlayer.open([uri]'{sound_file}'); "
-                    f"$mediaPlayer.Play(); "
-                    f"Start-Sleep -Seconds 1; "
-                    f"while($mediaPlayer.NaturalDuration.HasTimeSpan -eq $false) {{ Start-Sleep -Milliseconds 100 }}; "
-                    f"$duration = $mediaPlayer.NaturalDuration.TimeSpan.TotalSeconds; "
-                    f"Start-Sleep -Seconds $duration; "
-                    f"$mediaPlayer.Stop(); "
-                    f"$mediaPlayer.Close()"
-                ], check=False, capture_output=True)
-            except Exception as e:
-                print(f"Error playing sound in background: {e}")
+        name = sound_name.lower()
+        sound_file = _SOUNDS.get(name)
+        if sound_file is None:
+            return CommandResult(False, f"Sound file not found: {os.path.join(_SOUND_DIR, name + '.mp3')}")
         
-        # Start background thread
-        sound_thread = threading.Thread(target=play_in_background, daemon=True)
-        sound_thread.start()
+        # Opening a sound that was not preloaded can take a while, so
+        # playback is started on the shared pool instead of the caller's thread
+        _SOUND_POOL.submit(_start_playback, name, sound_file)
         
         return CommandResult(True, f"Playing sound: {sound_name}")
         
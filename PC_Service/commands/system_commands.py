@@ -2,83 +2,64 @@
 System Commands for ESP32 CYD PC Service
 Handles system-level operations like shutdown, restart, sleep
 """
-import platform
+import functools
+import logging
 import time
+from .platform_info import SYSTEM
 from .command_executor import (
     ProcessCommandExecutor, ConfirmationCommandExecutor, CommandResult
 )
 from config import REQUIRE_SHUTDOWN_CONFIRMATION, SHUTDOWN_CONFIRMATION_TIMEOUT
 
+logger = logging.getLogger(__name__)
+
+# System commands per operating system; a missing key means unsupported
+_SYS_TABLE = {
+    "windows": {
+        "shutdown": "shutdown /s /t 5 /c \"Shutdown initiated by ESP32 CYD\"",
+        "restart": "shutdown /r /t 5 /c \"Restart initiated by ESP32 CYD\"",
+        "sleep": "rundll32.exe powrprof.dll,SetSuspendState 0,1,0",
+        "hibernate": "shutdown /h",
+        "cancel": "shutdown /a"
+    },
+    "darwin": {
+        "shutdown": "sudo shutdown -h +1",
+        "restart": "sudo shutdown -r +1",
+        "sleep": "pmset sleepnow",
+        "hibernate": "pmset sleepnow",  # macOS doesn't distinguish hibernate from sleep
+        # For Unix-like systems, we'd need to kill the shutdown process
+        "cancel": "sudo pkill -f shutdown"
+    },
+    "linux": {
+        "shutdown": "sudo shutdown -h +1",
+        "restart": "sudo shutdown -r +1",
+        "sleep": "systemctl suspend",
+        "hibernate": "systemctl hibernate",
+        "cancel": "sudo pkill -f shutdown"
+    }
+}
+
 
 class SystemCommands:
     """Handles system-level commands"""
     
     def __init__(self):
-        self.system = platform.system().lower()
+        self.system = SYSTEM
         self._setup_executors()
     
     def _setup_executors(self):
         """Setup system command executors based on the operating system"""
-        if self.system == "windows":
-            # Windows shutdown commands
-            shutdown_executor = ProcessCommandExecutor(
-                "Shutdown",
-                "shutdown /s /t 5 /c \"Shutdown initiated by ESP32 CYD\""
-            )
-            restart_executor = ProcessCommandExecutor(
-                "Restart",
-                "shutdown /r /t 5 /c \"Restart initiated by ESP32 CYD\""
-            )
-            sleep_executor = ProcessCommandExecutor(
-                "Sleep",
-                "rundll32.exe powrprof.dll,SetSuspendState 0,1,0"
-            )
-            hibernate_executor = ProcessCommandExecutor(
-                "Hibernate",
-                "shutdown /h"
-            )
-            
-        elif self.system == "darwin":  # macOS
-            shutdown_executor = ProcessCommandExecutor(
-                "Shutdown",
-                "sudo shutdown -h +1"
-            )
-            restart_executor = ProcessCommandExecutor(
-                "Restart",
-                "sudo shutdown -r +1"
-            )
-            sleep_executor = ProcessCommandExecutor(
-                "Sleep",
-                "pmset sleepnow"
-            )
-            hibernate_executor = ProcessCommandExecutor(
-                "Hibernate",
-                "pmset sleepnow"  # macOS doesn't distinguish hibernate from sleep
-            )
-            
-        elif self.system == "linux":
-            shutdown_executor = ProcessCommandExecutor(
-                "Shutdown",
-                "sudo shutdown -h +1"
-            )
-            restart_executor = ProcessCommandExecutor(
-                "Restart",
-                "sudo shutdown -r +1"
-            )
-            sleep_executor = ProcessCommandExecutor(
-                "Sleep",
-                "systemctl suspend"
-            )
-            hibernate_executor = ProcessCommandExecutor(
-                "Hibernate",
-                "systemctl hibernate"
-            )
-        else:
-            # Unsupported system
-            shutdown_executor = None
-            restart_executor = None
-            sleep_executor = None
-            hibernate_executor = None
+        commands = _SYS_TABLE.get(self.system, {})
+        
+        def executor(key, name):
+            command = commands.get(key)
+            return ProcessCommandExecutor(name, command) if command else None
+        
+        shutdown_executor = executor("shutdown", "Shutdown")
+        restart_executor = executor("restart", "Restart")
+        sleep_executor = executor("sleep", "Sleep")
+        hibernate_executor = executor("hibernate", "Hibernate")
+        self.cancel_executor = executor("cancel", "Cancel Shutdown")
         
         # Wrap critical commands with confirmation if required
         if REQUIRE_SHUTDOWN_CONFIRMATION:
@@ -100,6 +81,17 @@ class SystemCommands:
         # Sleep and hibernate don't need confirmation
         self.sleep_executor = sleep_executor
         self.hibernate_executor = hibernate_executor
+        
+        # Resolved once; the executors never change after setup
+        self._shutdown_supports_confirm = isinstance(
+            self.shutdown_executor, ConfirmationCommandExecutor)
+        self._restart_supports_confirm = isinstance(
+            self.restart_executor, ConfirmationCommandExecutor)
+        
+        self._available_commands = tuple(
+            name for name in ("shutdown", "restart", "sleep", "hibernate")
+            if getattr(self, f"{name}_executor")
+        ) + ("cancel_shutdown",)
     
     def shutdown(self) -> CommandResult:
         """Shutdown the system"""
@@ -108,7 +100,7 @@ class SystemCommands:
                                f"Shutdown not available on {self.system}")
         
         try:
-            print("Initiating system shutdown...")
+            logger.info("Initiating system shutdown...")
             return self.shutdown_executor.safe_execute()
         except Exception as e:
             return CommandResult(False, "Shutdown failed", str(e))
@@ -120,7 +112,7 @@ class SystemCommands:
                                f"Restart not available on {self.system}")
         
         try:
-            print("Initiating system restart...")
+            logger.info("Initiating system restart...")
             return self.restart_executor.safe_execute()
         except Exception as e:
             return CommandResult(False, "Restart failed", str(e))
@@ -132,7 +124,7 @@ class SystemCommands:
                                f"Sleep not available on {self.system}")
         
         try:
-            print("Putting system to sleep...")
+            logger.info("Putting system to sleep...")
             return self.sleep_executor.safe_execute()
         except Exception as e:
             return CommandResult(False, "Sleep failed", str(e))
@@ -144,38 +136,25 @@ class SystemCommands:
                                f"Hibernate not available on {self.system}")
         
         try:
-            print("Hibernating system...")
+            logger.info("Hibernating system...")
             return self.hibernate_executor.safe_execute()
         except Exception as e:
             return CommandResult(False, "Hibernate failed", str(e))
     
     def cancel_shutdown(self) -> CommandResult:
         """Cancel a pending shutdown"""
+        if not self.cancel_executor:
+            return CommandResult(False, "Cancel shutdown not supported",
+                               f"Cancel shutdown not available on {self.system}")
+        
         try:
-            if self.system == "windows":
-                cancel_executor = ProcessCommandExecutor(
-                    "Cancel Shutdown",
-                    "shutdown /a"
-                )
-            elif self.system in ["darwin", "linux"]:
-                # For Unix-like systems, we'd need to kill the shutdown process
-                cancel_executor = ProcessCommandExecutor(
-                    "Cancel Shutdown",
-                    "sudo pkill -f shutdown"
-                )
-            else:
-                return CommandResult(False, "Cancel shutdown not supported",
-                                   f"Cancel shutdown not available on {self.system}")
-            
-            return cancel_executor.safe_execute()
-            
+            return self.cancel_executor.safe_execute()
         except Exception as e:
             return CommandResult(False, "Failed to cancel shutdown", str(e))
     
     def confirm_shutdown(self, confirmation_id: str) -> CommandResult:
         """Confirm a pending shutdown operation"""
-        if (REQUIRE_SHUTDOWN_CONFIRMATION and 
-            hasattr(self.shutdown_executor, 'confirm_execution')):
+        if self._shutdown_supports_confirm:
             return self.shutdown_executor.confirm_execution(confirmation_id)
         else:
             return CommandResult(False, "No confirmation required",
@@ -183,20 +162,28 @@ class SystemCommands:
     
     def confirm_restart(self, confirmation_id: str) -> CommandResult:
         """Confirm a pending restart operation"""
-        if (REQUIRE_SHUTDOWN_CONFIRMATION and 
-            hasattr(self.restart_executor, 'confirm_execution')):
+        if self._restart_supports_confirm:
             return self.restart_executor.confirm_execution(confirmation_id)
         else:
             return CommandResult(False, "No confirmation required",
                                "Restart confirmation is not enabled")
     
-    def get_system_info(self) -> dict:
-        """Get system information"""
+    @functools.cached_property
+    def _static_info(self) -> dict:
+        """Platform details that cannot change while the process runs"""
+        # Imported here so loading the module stays free of platform probing
+        import platform
         return {
             "system": self.system,
             "platform": platform.platform(),
             "machine": platform.machine(),
-            "processor": platform.processor(),
+            "processor": platform.processor()
+        }
+    
+    def get_system_info(self) -> dict:
+        """Get system information"""
+        return {
+            **self._static_info,
             "shutdown_confirmation_required": REQUIRE_SHUTDOWN_CONFIRMATION,
             "shutdown_confirmation_timeout": SHUTDOWN_CONFIRMATION_TIMEOUT,
             "available_commands": self.get_available_commands()
@@ -204,66 +191,45 @@ class SystemCommands:
     
     def get_available_commands(self) -> list:
         """Get list of available system commands"""
-        commands = []
-        
-        if self.shutdown_executor:
-            commands.append("shutdown")
-        if self.restart_executor:
-            commands.append("restart")
-        if self.sleep_executor:
-            commands.append("sleep")
-        if self.hibernate_executor:
-            commands.append("hibernate")
-        
-        commands.append("cancel_shutdown")
-        
-        return commands
-    
-    def cleanup_expired_confirmations(self):
-        """Clean up expired confirmation requests"""
-        if (REQUIRE_SHUTDOWN_CONFIRMATION and 
-            hasattr(self.shutdown_executor, 'cleanup_expired_confirmations')):
-            self.shutdown_executor.cleanup_expired_confirmations()
-        
-        if (REQUIRE_SHUTDOWN_CONFIRMATION and 
-            hasattr(self.restart_executor, 'cleanup_expired_confirmations')):
-            self.restart_executor.cleanup_expired_confirmations()
+        return list(self._available_commands)
 
 
-# Global instance
-system_commands = SystemCommands()
+@functools.cache
+def get_system_commands() -> SystemCommands:
+    """Get the shared SystemCommands instance, creating it on first use"""
+    return SystemCommands()
 
 
 def shutdown() -> CommandResult:
     """Convenience function to shutdown system"""
-    return system_commands.shutdown()
+    return get_system_commands().shutdown()
 
 
 def restart() -> CommandResult:
     """Convenience function to restart system"""
-    return system_commands.restart()
+    return get_system_commands().restart()
 
 
 def sleep() -> CommandResult:
     """Convenience function to sleep system"""
-    return system_commands.sleep()
+    return get_system_commands().sleep()
 
 
 def hibernate() -> CommandResult:
     """Convenience function to hibernate system"""
-    return system_commands.hibernate()
+    return get_system_commands().hibernate()
 
 
 def cancel_shutdown() -> CommandResult:
     """Convenience function to cancel shutdown"""
-    return system_commands.cancel_shutdown()
+    return get_system_commands().cancel_shutdown()
 
 
 def confirm_shutdown(confirmation_id: str) -> CommandResult:
     """Convenience function to confirm shutdown"""
-    return system_commands.confirm_shutdown(confirmation_id)
+    return get_system_commands().confirm_shutdown(confirmation_id)
 
 
 def confirm_restart(confirmation_id: str) -> CommandResult:
     """Convenience function to confirm restart"""
-    return system_commands.confirm_restart(confirmation_id)
+    return get_system_commands().confirm_restart(confirmation_id)
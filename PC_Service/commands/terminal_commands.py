@@ -2,26 +2,43 @@
 Terminal Commands for ESP32 CYD PC Service
 Handles terminal and command prompt operations
 """
+import functools
+import logging
 import os
-import platform
+import shutil
+from .platform_info import IS_WINDOWS, IS_DARWIN, IS_LINUX, SYSTEM
 from .command_executor import AsyncProcessCommandExecutor, CommandResult
 
+logger = logging.getLogger(__name__)
+
+# Shell templates for opening a terminal that runs a given command
+_COMMAND_TEMPLATES = {
+    "windows": 'wt.exe cmd /k "{command}"',
+    "darwin": 'osascript -e \'tell app "Terminal" to do script "{command}"\'',
+    "linux": 'gnome-terminal -- bash -c "{command}; exec bash"'
+}
+
 
 class TerminalCommands:
     """Handles terminal-related commands"""
     
     def __init__(self):
-        self.system = platform.system().lower()
+        self.system = SYSTEM
         self._setup_executors()
     
     def _setup_executors(self):
         """Setup command executors based on the operating system"""
-        if self.system == "windows":
-            # Windows Terminal (preferred) or Command Prompt
+        # Template for opening a terminal that runs a given command
+        self._command_template = _COMMAND_TEMPLATES.get(self.system)
+        
+        if IS_WINDOWS:
+            # Windows Terminal (preferred) when installed, else Command Prompt
+            wt_path = shutil.which("wt.exe")
             self.terminal_executor = AsyncProcessCommandExecutor(
                 "Windows Terminal", 
-                "wt.exe"
-            )
+                [wt_path],
+                shell=False
+            ) if wt_path else None
             self.cmd_executor = AsyncProcessCommandExecutor(
                 "Command Prompt",
                 "cmd.exe"
@@ -30,12 +47,13 @@ class TerminalCommands:
                 "PowerShell",
                 "powershell.exe"
             )
-        elif self.system == "darwin":  # macOS
+        elif IS_DARWIN:  # macOS
             self.terminal_executor = AsyncProcessCommandExecutor(
                 "Terminal",
-                "open -a Terminal"
+                ["open", "-a", "Terminal"],
+                shell=False
             )
-        elif self.system == "linux":
+        elif IS_LINUX:
             # Try common Linux terminals
             self.terminal_executor = AsyncProcessCommandExecutor(
                 "Terminal",
@@ -45,19 +63,23 @@ class TerminalCommands:
             # Fallback
             self.terminal_executor = AsyncProcessCommandExecutor(
                 "Terminal",
-                "xterm"
+                ["xterm"],
+                shell=False
             )
     
     def open_terminal(self) -> CommandResult:
         """Open the default terminal"""
         try:
-            if self.system == "windows":
+            if IS_WINDOWS:
                 # Try Windows Terminal first, fallback to cmd
-                result = self.terminal_executor.safe_execute()
-                if not result.success:
-                    print("Windows Terminal not available, trying Command Prompt...")
-                    result = self.cmd_executor.safe_execute()
-                return result
+                if self.terminal_executor is not None:
+                    result = self.terminal_executor.safe_execute()
+                    if result.success:
+                        return result
+                    logger.info("Windows Terminal failed to start, trying Command Prompt...")
+                else:
+                    logger.info("Windows Terminal not installed, using Command Prompt")
+                return self.cmd_executor.safe_execute()
             else:
                 return self.terminal_executor.safe_execute()
                 
@@ -66,7 +88,7 @@ class TerminalCommands:
     
     def open_command_prompt(self) -> CommandResult:
         """Open Command Prompt (Windows specific)"""
-        if self.system != "windows":
+        if not IS_WINDOWS:
             return CommandResult(False, "Command Prompt not available", 
                                "Command Prompt is Windows-specific")
         
@@ -74,7 +96,7 @@ class TerminalCommands:
     
     def open_powershell(self) -> CommandResult:
         """Open PowerShell (Windows specific)"""
-        if self.system != "windows":
+        if not IS_WINDOWS:
             return CommandResult(False, "PowerShell not available",
                                "PowerShell is Windows-specific")
         
@@ -82,32 +104,15 @@ class TerminalCommands:
     
     def open_terminal_with_command(self, command: str) -> CommandResult:
         """Open terminal and execute a specific command"""
+        if self._command_template is None:
+            return CommandResult(False, "Unsupported system",
+                               f"Terminal with command not supported on {self.system}")
+        
         try:
-            if self.system == "windows":
-                # Windows Terminal with command
-                full_command = f'wt.exe cmd /k "{command}"'
-                executor = AsyncProcessCommandExecutor(
-                    "Terminal with Command",
-                    full_command
-                )
-            elif self.system == "darwin":  # macOS
-                # Terminal with command
-                full_command = f'osascript -e \'tell app "Terminal" to do script "{command}"\''
-                executor = AsyncProcessCommandExecutor(
-                    "Terminal with Command",
-                    full_command
-                )
-            elif self.system == "linux":
-                # Linux terminal with command
-                full_command = f'gnome-terminal -- bash -c "{command}; exec bash"'
-                executor = AsyncProcessCommandExecutor(
-                    "Terminal with Command",
-                    full_command
-                )
-            else:
-                return CommandResult(False, "Unsupported system",
-                                   f"Terminal with command not supported on {self.system}")
-            
+            executor = AsyncProcessCommandExecutor(
+                "Terminal with Command",
+                self._command_template.format(command=command)
+            )
             return executor.safe_execute()
             
         except Exception as e:
@@ -117,18 +122,18 @@ class TerminalCommands:
         """Get list of available terminal applications"""
         terminals = []
         
-        if self.system == "windows":
+        if IS_WINDOWS:
             terminals = [
                 {"name": "Windows Terminal", "command": "wt.exe"},
                 {"name": "Command Prompt", "command": "cmd.exe"},
                 {"name": "PowerShell", "command": "powershell.exe"}
             ]
-        elif self.system == "darwin":
+        elif IS_DARWIN:
             terminals = [
                 {"name": "Terminal", "command": "open -a Terminal"},
                 {"name": "iTerm2", "command": "open -a iTerm"}
             ]
-        elif self.system == "linux":
+        elif IS_LINUX:
             terminals = [
                 {"name": "GNOME Terminal", "command": "gnome-terminal"},
                 {"name": "XTerm", "command": "xterm"},
@@ -139,25 +144,27 @@ class TerminalCommands:
         return terminals
 
 
-# Global instance
-terminal_commands = TerminalCommands()
+@functools.cache
+def get_terminal_commands() -> TerminalCommands:
+    """Get the shared TerminalCommands instance, creating it on first use"""
+    return TerminalCommands()
 
 
 def open_terminal() -> CommandResult:
     """Convenience function to open terminal"""
-    return terminal_commands.open_terminal()
+    return get_terminal_commands().open_terminal()
 
 
 def open_command_prompt() -> CommandResult:
     """Convenience function to open command prompt"""
-    return terminal_commands.open_command_prompt()
+    return get_terminal_commands().open_command_prompt()
 
 
 def open_powershell() -> CommandResult:
     """Convenience function to open PowerShell"""
-    return terminal_commands.open_powershell()
+    return get_terminal_commands().open_powershell()
 
 
 def open_terminal_with_command(command: str) -> CommandResult:
     """Convenience function to open terminal with command"""
-    return terminal_commands.open_terminal_with_command(command)
+    return get_terminal_commands().open_terminal_with_command(command)
@@ -9,15 +9,25 @@ BAUD_RATE = 115200
 SERIAL_TIMEOUT = 1.0
 RECONNECT_DELAY = 2.0
 MAX_RECONNECT_ATTEMPTS = 0  # 0 = infinite attempts
+SERIAL_LOW_LATENCY = True  # Ask the driver to skip the USB latency timer (Linux)
+SERIAL_SUPPRESS_RESET = True  # Keep DTR/RTS low on open so the ESP32 is not rebooted
 
 # System Monitoring Settings
 SYSTEM_UPDATE_INTERVAL = 10  # seconds
-CPU_SAMPLE_INTERVAL = 1.0   # seconds for CPU percentage calculation
+# While CPU and RAM stay steady the interval grows by this factor per update,
+# up to the maximum; keep the maximum below the ESP32's 30 s staleness limit
+SYSTEM_UPDATE_BACKOFF = 1.5
+SYSTEM_UPDATE_MAX_INTERVAL = 20  # seconds
+SYSTEM_UPDATE_STEADY_PERCENT = 1.0  # CPU points / percent of total RAM
 
 # JSON Protocol Settings
 MESSAGE_DELIMITER = "\n"
 MAX_MESSAGE_LENGTH = 1024
 JSON_INDENT = None  # None for compact JSON, 2 for pretty printing
+# Send message types as numeric codes ("type":2) instead of names
+# ("type":"system_data"). Firmware that predates the codes ignores such
+# frames, so only enable this once the ESP32 has been reflashed.
+NUMERIC_MESSAGE_TYPES = False
 
 # Logging Settings
 LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
@@ -28,9 +38,16 @@ LOG_BACKUP_COUNT = 5
 
 # Command Execution Settings
 COMMAND_TIMEOUT = 30.0  # seconds
+# How long a fire-and-forget launch is watched for an immediate failure
+# (missing program, unknown app); launches still running after this count
+# as started
+LAUNCH_CHECK_TIMEOUT = 0.2  # seconds
 REQUIRE_SHUTDOWN_CONFIRMATION = True
 SHUTDOWN_CONFIRMATION_TIMEOUT = 10.0  # seconds
 
+# Browser Settings
+BROWSER_PREWARM = False  # Launch Chrome when the service starts
+
 # Application Settings
 SERVICE_NAME = "ESP32 CYD PC Service"
 VERSION = "1.0.0"
@@ -40,5 +57,7 @@ DEBUG_MODE = False
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 
-# Create log directory if it doesn't exist
-os.makedirs(LOG_DIR, exist_ok=True)
+
+def init_log_dir():
+    """Create the log directory if it doesn't exist"""
+    os.makedirs(LOG_DIR, exist_ok=True)
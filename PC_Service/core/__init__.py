@@ -3,16 +3,16 @@ Core modules for ESP32 CYD PC Service
 """
 from .json_protocol import (
     JSONProtocol, MessageType, CommandType, StatusType,
-    create_system_data_message, create_status_message, create_ack_message,
-    parse_message, is_json_line
+    create_system_data_message, create_system_data_frame,
+    create_status_message, create_ack_message, parse_message, is_json_line
 )
 from .serial_handler import SerialHandler, create_serial_handler
 from .system_monitor import SystemMonitor, get_system_data, get_formatted_summary
 
 __all__ = [
     'JSONProtocol', 'MessageType', 'CommandType', 'StatusType',
-    'create_system_data_message', 'create_status_message', 'create_ack_message',
-    'parse_message', 'is_json_line',
+    'create_system_data_message', 'create_system_data_frame',
+    'create_status_message', 'create_ack_message', 'parse_message', 'is_json_line',
     'SerialHandler', 'create_serial_handler',
     'SystemMonitor', 'get_system_data', 'get_formatted_summary'
 ]
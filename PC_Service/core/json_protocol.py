@@ -4,18 +4,42 @@ Handles message serialization, parsing, and validation
 """
 import json
 import time
+from enum import IntEnum
 from typing import Dict, Any, Optional, Union
-from config import JSON_INDENT, MAX_MESSAGE_LENGTH
+from config import JSON_INDENT, MAX_MESSAGE_LENGTH, NUMERIC_MESSAGE_TYPES
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class MessageType(IntEnum):
+    """Message type codes; received string types are mapped onto these"""
+    COMMAND = 1
+    SYSTEM_DATA = 2
+    STATUS = 3
+    ACK = 4
+    HEARTBEAT = 5
+    ERROR = 6
 
-class MessageType:
-    """Message type constants"""
-    COMMAND = "command"
-    SYSTEM_DATA = "system_data"
-    STATUS = "status"
-    ACK = "ack"
-    HEARTBEAT = "heartbeat"
-    ERROR = "error"
+
+# Message type names used by firmware that still sends string types
+_MESSAGE_TYPE_NAMES = {
+    "command": MessageType.COMMAND,
+    "system_data": MessageType.SYSTEM_DATA,
+    "status": MessageType.STATUS,
+    "ack": MessageType.ACK,
+    "heartbeat": MessageType.HEARTBEAT,
+    "error": MessageType.ERROR
+}
+
+# Value written to "type" in outgoing frames; names unless the firmware on
+# the other end understands the numeric codes
+_WIRE_TYPES = {
+    message_type: int(message_type) if NUMERIC_MESSAGE_TYPES else name
+    for name, message_type in _MESSAGE_TYPE_NAMES.items()
+}
 
 
 class CommandType:
@@ -33,25 +57,84 @@ class StatusType:
     ERROR = "error"
 
 
+# Built once instead of on every validation call
+_VALID_COMMANDS = frozenset({CommandType.INIT, CommandType.TEST, CommandType.EXIT})
+
+# Short wire keys for the flat system_data frame and the monitor fields
+# they carry
+_SYSTEM_DATA_FIELDS = (
+    ("date", "date"),
+    ("time", "time"),
+    ("cpu", "cpu_percent"),
+    ("ram_used", "ram_used_gb"),
+    ("ram_total", "ram_total_gb"),
+    ("net_up", "network_sent_mb"),
+    ("net_down", "network_recv_mb")
+)
+
+
+def _dump_str(value: str) -> str:
+    """Serialize a single string as a JSON literal"""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+
+# Whitespace allowed around a frame on top of MAX_MESSAGE_LENGTH
+_LENGTH_SLACK = 4
+
+
 class JSONProtocol:
     """Handles JSON message protocol for ESP32 communication"""
     
     def __init__(self):
         self.message_delimiter = "\n"
+        # Serialized prefixes for status messages that carry no details;
+        # only the compact layout can be spliced together this way
+        self._status_templates = {
+            state: f'{{"type":{json.dumps(_WIRE_TYPES[MessageType.STATUS])},"state":"{state}"'
+            for state in (StatusType.CONNECTED, StatusType.DISCONNECTED,
+                          StatusType.READY, StatusType.ERROR)
+        } if JSON_INDENT is None else {}
+        # Same for acknowledgments of the known commands
+        self._ack_templates = {
+            (command, result): (f'{{"type":{json.dumps(_WIRE_TYPES[MessageType.ACK])},'
+                                f'"command":"{command}","result":"{result}"')
+            for command in _VALID_COMMANDS
+            for result in ("success", "failed", "error")
+        } if JSON_INDENT is None else {}
     
-    def create_system_data_message(self, system_data: Dict[str, Any]) -> str:
+    def create_system_data_message(self, system_data: Dict[str, Any]) -> bytes:
         """Create a system data message"""
         message = {
-            "type": MessageType.SYSTEM_DATA,
+            "type": _WIRE_TYPES[MessageType.SYSTEM_DATA],
             "timestamp": time.time(),
             "data": system_data
         }
         return self._serialize_message(message)
     
-    def create_status_message(self, status: str, details: Optional[str] = None) -> str:
+    def create_system_data_frame(self, system_data: Dict[str, Any]) -> bytes:
+        """Create the compact, flat system data frame sent to the ESP32"""
+        message = {"type": _WIRE_TYPES[MessageType.SYSTEM_DATA]}
+        for wire_key, field in _SYSTEM_DATA_FIELDS:
+            message[wire_key] = system_data[field]
+        
+        if orjson is not None:
+            # orjson already produces compact UTF-8 bytes and writes the
+            # newline into the same buffer
+            return orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE)
+        return (json.dumps(message, separators=(',', ':')) + "\n").encode('utf-8')
+    
+    def create_status_message(self, status: str, details: Optional[str] = None) -> bytes:
         """Create a status message"""
+        template = None if details else self._status_templates.get(status)
+        if template is not None:
+            # repr() gives the same float text as json and orjson
+            timestamp = time.time()
+            return f'{template},"timestamp":{timestamp!r}}}{self.message_delimiter}'.encode()
+        
         message = {
-            "type": MessageType.STATUS,
+            "type": _WIRE_TYPES[MessageType.STATUS],
             "state": status,
             "timestamp": time.time()
         }
@@ -59,10 +142,19 @@ class JSONProtocol:
             message["details"] = details
         return self._serialize_message(message)
     
-    def create_ack_message(self, command: str, result: str, details: Optional[str] = None) -> str:
+    def create_ack_message(self, command: str, result: str, details: Optional[str] = None) -> bytes:
         """Create an acknowledgment message"""
+        template = self._ack_templates.get((command, result))
+        if template is not None:
+            timestamp = time.time()
+            if details:
+                # Only the free-text details still need escaping
+                return (f'{template},"timestamp":{timestamp!r},'
+                        f'"details":{_dump_str(details)}}}{self.message_delimiter}').encode()
+            return f'{template},"timestamp":{timestamp!r}}}{self.message_delimiter}'.encode()
+        
         message = {
-            "type": MessageType.ACK,
+            "type": _WIRE_TYPES[MessageType.ACK],
             "command": command,
             "result": result,
             "timestamp": time.time()
@@ -71,35 +163,48 @@ class JSONProtocol:
             message["details"] = details
         return self._serialize_message(message)
     
-    def create_error_message(self, error_code: str, error_message: str) -> str:
+    def create_error_message(self, error_code: str, error_message: str) -> bytes:
         """Create an error message"""
         message = {
-            "type": MessageType.ERROR,
+            "type": _WIRE_TYPES[MessageType.ERROR],
             "error_code": error_code,
             "message": error_message,
             "timestamp": time.time()
         }
         return self._serialize_message(message)
     
-    def parse_message(self, raw_message: str) -> Optional[Dict[str, Any]]:
+    def parse_message(self, raw_message: Union[str, bytes]) -> Optional[Dict[str, Any]]:
         """
         Parse a JSON message from ESP32
         Returns None if not a valid JSON message
         """
         try:
-            # Clean the message
-            message = raw_message.strip()
-            
-            # Check if it looks like JSON
-            if not (message.startswith('{') and message.endswith('}')):
+            # Reject oversize frames before paying for strip() or a parse;
+            # the slack allows for line endings and padding
+            if len(raw_message) > MAX_MESSAGE_LENGTH + _LENGTH_SLACK:
                 return None
             
-            # Check message length
-            if len(message) > MAX_MESSAGE_LENGTH:
-                raise ValueError(f"Message too long: {len(message)} > {MAX_MESSAGE_LENGTH}")
-            
-            # Parse JSON
-            parsed = json.loads(message)
+            if orjson is not None:
+                # orjson tolerates surrounding whitespace and rejects debug
+                # output about as cheaply as the string checks below
+                parsed = orjson.loads(raw_message)
+            else:
+                if isinstance(raw_message, bytes):
+                    raw_message = raw_message.decode('utf-8', errors='ignore')
+                
+                # Clean the message
+                message = raw_message.strip()
+                
+                # Check if it looks like JSON
+                if not (message.startswith('{') and message.endswith('}')):
+                    return None
+                
+                # Check message length
+                if len(message) > MAX_MESSAGE_LENGTH:
+                    raise ValueError(f"Message too long: {len(message)} > {MAX_MESSAGE_LENGTH}")
+                
+                # Parse JSON
+                parsed = json.loads(message)
             
             # Validate basic structure
             if not isinstance(parsed, dict):
@@ -109,10 +214,16 @@ class JSONProtocol:
             if "type" not in parsed:
                 return None
             
+            # Map legacy string types onto their numeric codes
+            msg_type = parsed["type"]
+            if isinstance(msg_type, str):
+                parsed["type"] = _MESSAGE_TYPE_NAMES.get(msg_type, msg_type)
+            
             return parsed
             
-        except (json.JSONDecodeError, ValueError) as e:
+        except ValueError:
             # Not a valid JSON message, probably debug output
+            # (json and orjson decode errors both subclass ValueError)
             return None
     
     def validate_command_message(self, message: Dict[str, Any]) -> bool:
@@ -120,27 +231,28 @@ class JSONProtocol:
         if message.get("type") != MessageType.COMMAND:
             return False
         
-        required_fields = ["action", "timestamp"]
-        return all(field in message for field in required_fields)
+        return "action" in message and "timestamp" in message
     
     def validate_heartbeat_message(self, message: Dict[str, Any]) -> bool:
         """Validate a heartbeat message structure"""
         if message.get("type") != MessageType.HEARTBEAT:
             return False
         
-        required_fields = ["timestamp"]
-        return all(field in message for field in required_fields)
+        return "timestamp" in message
     
     def is_valid_command(self, command: str) -> bool:
         """Check if command is valid"""
-        valid_commands = [CommandType.INIT, CommandType.TEST, CommandType.EXIT]
-        return command in valid_commands
+        return command in _VALID_COMMANDS
     
-    def _serialize_message(self, message: Dict[str, Any]) -> str:
-        """Serialize message to JSON string"""
+    def _serialize_message(self, message: Dict[str, Any]) -> bytes:
+        """Serialize message to a newline-terminated UTF-8 frame"""
         try:
+            if orjson is not None and JSON_INDENT is None:
+                # orjson emits compact UTF-8 bytes by default, ready for
+                # the port without a str round trip
+                return orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE)
             json_str = json.dumps(message, indent=JSON_INDENT, separators=(',', ':'))
-            return json_str + self.message_delimiter
+            return (json_str + self.message_delimiter).encode('utf-8')
         except (TypeError, ValueError) as e:
             raise ValueError(f"Failed to serialize message: {e}")
     
@@ -161,22 +273,27 @@ class JSONProtocol:
 protocol = JSONProtocol()
 
 
-def create_system_data_message(system_data: Dict[str, Any]) -> str:
+def create_system_data_message(system_data: Dict[str, Any]) -> bytes:
     """Convenience function to create system data message"""
     return protocol.create_system_data_message(system_data)
 
 
-def create_status_message(status: str, details: Optional[str] = None) -> str:
+def create_system_data_frame(system_data: Dict[str, Any]) -> bytes:
+    """Convenience function to create the compact system data frame"""
+    return protocol.create_system_data_frame(system_data)
+
+
+def create_status_message(status: str, details: Optional[str] = None) -> bytes:
     """Convenience function to create status message"""
     return protocol.create_status_message(status, details)
 
 
-def create_ack_message(command: str, result: str, details: Optional[str] = None) -> str:
+def create_ack_message(command: str, result: str, details: Optional[str] = None) -> bytes:
     """Convenience function to create ack message"""
     return protocol.create_ack_message(command, result, details)
 
 
-def parse_message(raw_message: str) -> Optional[Dict[str, Any]]:
+def parse_message(raw_message: Union[str, bytes]) -> Optional[Dict[str, Any]]:
     """Convenience function to parse message"""
     return protocol.parse_message(raw_message)
 
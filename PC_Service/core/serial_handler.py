@@ -2,28 +2,42 @@
 Serial Handler for ESP32 CYD PC Service
 Manages robust serial communication with automatic reconnection
 """
+import logging
+import os
+import select
 import serial
 import threading
 import time
-import queue
-from typing import Optional, Callable, Any
+from collections import deque
+from typing import Optional, Callable, Any, Union
 from config import (
     DEFAULT_SERIAL_PORT, BAUD_RATE, SERIAL_TIMEOUT, 
-    RECONNECT_DELAY, MAX_RECONNECT_ATTEMPTS
+    RECONNECT_DELAY, MAX_RECONNECT_ATTEMPTS, MAX_MESSAGE_LENGTH,
+    SERIAL_LOW_LATENCY, SERIAL_SUPPRESS_RESET
 )
 
+logger = logging.getLogger(__name__)
+
+# Frames held while the port is busy or disconnected before new ones are dropped
+_WRITE_QUEUE_LIMIT = 1024
+
+# Largest read taken from the port file descriptor in one call
+_READ_CHUNK_SIZE = 4096
+
 
 class SerialHandler:
     """Handles serial communication with ESP32 with robust reconnection"""
     
     def __init__(self, port: str = DEFAULT_SERIAL_PORT, 
-                 on_message_received: Optional[Callable[[str], None]] = None,
+                 on_message_received: Optional[Callable[[bytes], None]] = None,
                  on_connection_changed: Optional[Callable[[bool], None]] = None):
         self.port = port
         self.baud_rate = BAUD_RATE
         self.timeout = SERIAL_TIMEOUT
         self.reconnect_delay = RECONNECT_DELAY
         self.max_reconnect_attempts = MAX_RECONNECT_ATTEMPTS
+        self.low_latency = SERIAL_LOW_LATENCY
+        self.suppress_reset = SERIAL_SUPPRESS_RESET
         
         # Callbacks
         self.on_message_received = on_message_received
@@ -32,10 +46,21 @@ class SerialHandler:
         # Serial connection
         self.serial_connection: Optional[serial.Serial] = None
         self.is_connected = False
+        # Port file descriptor for direct reads; None where pyserial has
+        # no fileno() (Windows COM ports)
+        self._fd: Optional[int] = None
+        
+        # Received bytes not yet terminated by a newline
+        self._rx_buffer = bytearray()
         
         # Threading
         self.read_thread: Optional[threading.Thread] = None
-        self.write_queue = queue.Queue()
+        # Single consumer; deque append/popleft are atomic, and the event
+        # wakes the write thread
+        self._write_deque = deque()
+        self._write_event = threading.Event()
+        # Held by whichever thread is writing to the port
+        self._write_lock = threading.Lock()
         self.write_thread: Optional[threading.Thread] = None
         self.running = False
         
@@ -50,7 +75,7 @@ class SerialHandler:
         if self.running:
             return True
             
-        print(f"Starting serial handler on {self.port}...")
+        logger.info("Starting serial handler on %s...", self.port)
         self.running = True
         
         # Start threads
@@ -65,8 +90,10 @@ class SerialHandler:
     
     def stop(self):
         """Stop the serial handler"""
-        print("Stopping serial handler...")
+        logger.info("Stopping serial handler...")
         self.running = False
+        # Wake the write thread, which waits without a timeout
+        self._write_event.set()
         
         # Disconnect
         self._disconnect()
@@ -77,16 +104,56 @@ class SerialHandler:
         if self.write_thread and self.write_thread.is_alive():
             self.write_thread.join(timeout=2.0)
     
-    def send_message(self, message: str) -> bool:
-        """Queue a message to be sent"""
+    def send_message(self, message: Union[str, bytes]) -> bool:
+        """Send a message, queueing it if the port is busy"""
         if not self.running:
             return False
+        
+        # Encode and terminate once here so the write thread only writes
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        if not message.endswith(b'\n'):
+            message += b'\n'
             
+        # Write directly when nothing is queued, no other thread is writing
+        # and the driver's transmit buffer is empty, saving the hop through
+        # the write thread. A backed-up port could block the caller (often
+        # the read thread) inside write(), so that case goes to the queue.
+        if (not self._write_deque and self.is_connected
+                and self._write_lock.acquire(blocking=False)):
+            try:
+                connection = self.serial_connection
+                if (not self._write_deque and connection and connection.is_open
+                        and not self._output_pending(connection)):
+                    connection.write(message)
+                    self.messages_sent += 1
+                    return True
+            except serial.SerialException as e:
+                logger.error("Serial write error: %s", e)
+                self._disconnect()
+            finally:
+                self._write_lock.release()
+        
+        if len(self._write_deque) >= _WRITE_QUEUE_LIMIT:
+            logger.warning("Write queue is full, dropping message")
+            return False
+        
+        self._write_deque.append(message)
+        self._write_event.set()
+        return True
+    
+    @property
+    def queue_size(self) -> int:
+        """Number of frames waiting for the write thread"""
+        return len(self._write_deque)
+    
+    @staticmethod
+    def _output_pending(connection) -> bool:
+        """Whether the driver still holds unsent bytes for the port"""
         try:
-            self.write_queue.put(message, timeout=1.0)
-            return True
-        except queue.Full:
-            print("Write queue is full, dropping message")
+            return connection.out_waiting > 0
+        except (AttributeError, NotImplementedError, OSError, serial.SerialException):
+            # Backends without TIOCOUTQ; assume the buffer is free
             return False
     
     def _connect(self) -> bool:
@@ -95,20 +162,38 @@ class SerialHandler:
             if self.serial_connection and self.serial_connection.is_open:
                 return True
                 
-            print(f"Attempting to connect to {self.port}...")
+            logger.info("Attempting to connect to %s...", self.port)
             self.connection_attempts += 1
             
-            self.serial_connection = serial.Serial(
-                port=self.port,
+            # Configure before opening: the ESP32 auto-reset circuit pulses
+            # EN on the DTR/RTS edge that a default open() produces, which
+            # would reboot the board and leave it busy booting on every
+            # (re)connect
+            connection = serial.Serial(
                 baudrate=self.baud_rate,
                 timeout=self.timeout,
                 write_timeout=self.timeout
             )
+            connection.port = self.port
+            if self.suppress_reset:
+                connection.dtr = False
+                connection.rts = False
+            connection.open()
+            self.serial_connection = connection
             
             if self.serial_connection.is_open:
+                self._rx_buffer.clear()
+                if self.low_latency:
+                    self._enable_low_latency()
+                try:
+                    self._fd = self.serial_connection.fileno()
+                except (AttributeError, OSError):
+                    self._fd = None
                 self.is_connected = True
                 self.last_connection_time = time.time()
-                print(f"Connected to {self.port}")
+                logger.info("Connected to %s", self.port)
+                # Wake the write thread for anything held while disconnected
+                self._write_event.set()
                 
                 # Notify connection change
                 if self.on_connection_changed:
@@ -116,27 +201,38 @@ class SerialHandler:
                 
                 return True
             else:
-                print(f"Failed to open {self.port}")
+                logger.warning("Failed to open %s", self.port)
                 return False
                 
         except serial.SerialException as e:
-            print(f"Serial connection error: {e}")
+            logger.warning("Serial connection error: %s", e)
             return False
         except Exception as e:
-            print(f"Unexpected error connecting to {self.port}: {e}")
+            logger.error("Unexpected error connecting to %s: %s", self.port, e)
             return False
     
+    def _enable_low_latency(self):
+        """Set ASYNC_LOW_LATENCY so USB adapters deliver bytes immediately"""
+        # Only pyserial's Linux backend has set_low_latency_mode; it raises
+        # ValueError when the driver rejects the ioctl
+        try:
+            self.serial_connection.set_low_latency_mode(True)
+            logger.debug("Low-latency mode enabled on %s", self.port)
+        except (AttributeError, ValueError, OSError) as e:
+            logger.debug("Low-latency mode not available on %s: %s", self.port, e)
+    
     def _disconnect(self):
         """Disconnect from the serial port"""
         if self.serial_connection:
             try:
                 if self.serial_connection.is_open:
                     self.serial_connection.close()
-                    print(f"Disconnected from {self.port}")
+                    logger.info("Disconnected from %s", self.port)
             except Exception as e:
-                print(f"Error closing serial connection: {e}")
+                logger.error("Error closing serial connection: %s", e)
             finally:
                 self.serial_connection = None
+                self._fd = None
                 
         if self.is_connected:
             self.is_connected = False
@@ -156,69 +252,136 @@ class SerialHandler:
                         reconnect_attempts = 0
                     else:
                         reconnect_attempts += 1
-                        print(f"Reconnection attempt {reconnect_attempts} failed")
+                        logger.debug("Reconnection attempt %s failed", reconnect_attempts)
                         time.sleep(self.reconnect_delay)
                 else:
-                    print(f"Max reconnection attempts ({self.max_reconnect_attempts}) reached")
+                    logger.warning("Max reconnection attempts (%s) reached", self.max_reconnect_attempts)
                     time.sleep(self.reconnect_delay * 2)
                 continue
             
             try:
                 if self.serial_connection and self.serial_connection.is_open:
-                    # Check if data is available
-                    if self.serial_connection.in_waiting > 0:
-                        line = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
-                        if line:
-                            self.messages_received += 1
-                            if self.on_message_received:
-                                self.on_message_received(line)
-                    else:
-                        # Small delay to prevent busy waiting
-                        time.sleep(0.01)
+                    data = self._read_chunk()
+                    if data:
+                        self._rx_buffer += data
+                        self._dispatch_lines()
                 else:
                     self._disconnect()
                     
-            except serial.SerialException as e:
-                print(f"Serial read error: {e}")
+            except (serial.SerialException, OSError) as e:
+                logger.error("Serial read error: %s", e)
                 self._disconnect()
                 reconnect_attempts = 0
             except Exception as e:
-                print(f"Unexpected read error: {e}")
+                logger.error("Unexpected read error: %s", e)
                 time.sleep(0.1)
     
+    def _read_chunk(self) -> bytes:
+        """Wait up to the port timeout for data and return what is pending"""
+        fd = self._fd
+        if fd is None:
+            # Block in the driver until data arrives or the port timeout
+            # expires, then take everything already pending. readline()
+            # would fetch a single byte per read.
+            return self.serial_connection.read(
+                max(1, self.serial_connection.in_waiting))
+        
+        # POSIX: one select and one read per chunk, skipping pyserial's
+        # in_waiting ioctl and its per-call read bookkeeping
+        ready, _, _ = select.select([fd], [], [], self.timeout)
+        if not ready:
+            return b''
+        try:
+            data = os.read(fd, _READ_CHUNK_SIZE)
+        except BlockingIOError:
+            # The port is opened non-blocking; a spurious wakeup is harmless
+            return b''
+        if not data:
+            # Readable but empty means the device went away
+            raise serial.SerialException("device reports readiness to read but returned no data")
+        return data
+    
+    def _dispatch_lines(self):
+        """Hand every complete line in the receive buffer to the callback"""
+        buffer = self._rx_buffer
+        start = 0
+        end = buffer.find(b'\n')
+        try:
+            # Lines are copied straight out of the reused receive buffer
+            # through a view, one allocation per line
+            with memoryview(buffer) as view:
+                while end != -1:
+                    line_start, start = start, end + 1
+                    # MicroPython terminates lines with \r\n
+                    if end > line_start and buffer[end - 1] == 0x0D:
+                        end -= 1
+                    # Lines are handed over as bytes; the receiver decodes
+                    # only what it needs. strip() returns the same object
+                    # when there is nothing left to remove.
+                    raw = view[line_start:end].tobytes().strip()
+                    if raw:
+                        self.messages_received += 1
+                        if self.on_message_received:
+                            self.on_message_received(raw)
+                    end = buffer.find(b'\n', start)
+        finally:
+            # Consumed lines are dropped even if a callback raised; the
+            # view is released by now so the buffer can shrink
+            del buffer[:start]
+        
+        # Drop runaway output that never sends a newline
+        if len(buffer) > MAX_MESSAGE_LENGTH * 4:
+            logger.warning("Discarding %s bytes without a line ending", len(buffer))
+            buffer.clear()
+    
     def _write_loop(self):
         """Main write loop running in separate thread"""
         while self.running:
             try:
-                # Get message from queue with timeout
-                message = self.write_queue.get(timeout=0.1)
+                # Sleep until there is something to send; stop() also sets
+                # the event
+                self._write_event.wait()
+                self._write_event.clear()
                 
-                if self.is_connected and self.serial_connection and self.serial_connection.is_open:
-                    try:
-                        # Ensure message ends with newline
-                        if not message.endswith('\n'):
-                            message += '\n'
+                # The lock keeps direct writes from send_message from
+                # overtaking frames this thread has already dequeued
+                with self._write_lock:
+                    # Take everything queued so a burst goes out in a single
+                    # write (frames are newline-terminated)
+                    messages = []
+                    while self._write_deque:
+                        messages.append(self._write_deque.popleft())
+                    
+                    if not messages:
+                        continue
+                    
+                    connected = (self.is_connected and self.serial_connection
+                                 and self.serial_connection.is_open)
+                    if connected:
+                        try:
+                            self.serial_connection.write(b''.join(messages))
+                            self.messages_sent += len(messages)
                             
-                        self.serial_connection.write(message.encode('utf-8'))
-                        self.serial_connection.flush()
-                        self.messages_sent += 1
-                        
-                    except serial.SerialException as e:
-                        print(f"Serial write error: {e}")
-                        self._disconnect()
-                        # Put message back in queue to retry
-                        self.write_queue.put(message)
-                    except Exception as e:
-                        print(f"Unexpected write error: {e}")
-                else:
-                    # Not connected, put message back in queue
-                    self.write_queue.put(message)
-                    time.sleep(0.1)
+                            # Drain the UART only once the burst is written;
+                            # flush() blocks in tcdrain until the FIFO empties
+                            if not self._write_deque:
+                                self.serial_connection.flush()
+                            
+                        except serial.SerialException as e:
+                            logger.error("Serial write error: %s", e)
+                            self._disconnect()
+                            # Put messages back at the front of the queue; the
+                            # next connect sets the event to retry them
+                            self._write_deque.extendleft(reversed(messages))
+                        except Exception as e:
+                            logger.error("Unexpected write error: %s", e)
+                    else:
+                        # Not connected: hold the messages and sleep until
+                        # _connect or the next send sets the event
+                        self._write_deque.extendleft(reversed(messages))
                     
-            except queue.Empty:
-                continue
             except Exception as e:
-                print(f"Write loop error: {e}")
+                logger.error("Write loop error: %s", e)
                 time.sleep(0.1)
     
     def get_status(self) -> dict:
@@ -230,7 +393,7 @@ class SerialHandler:
             "messages_received": self.messages_received,
             "connection_attempts": self.connection_attempts,
             "last_connection_time": self.last_connection_time,
-            "queue_size": self.write_queue.qsize()
+            "queue_size": self.queue_size
         }
     
     def change_port(self, new_port: str) -> bool:
@@ -238,7 +401,7 @@ class SerialHandler:
         if new_port == self.port:
             return True
             
-        print(f"Changing port from {self.port} to {new_port}")
+        logger.info("Changing port from %s to %s", self.port, new_port)
         
         # Disconnect current connection
         self._disconnect()
@@ -251,7 +414,7 @@ class SerialHandler:
 
 
 def create_serial_handler(port: str = DEFAULT_SERIAL_PORT,
-                         on_message_received: Optional[Callable[[str], None]] = None,
+                         on_message_received: Optional[Callable[[bytes], None]] = None,
                          on_connection_changed: Optional[Callable[[bool], None]] = None) -> SerialHandler:
     """Factory function to create a serial handler"""
     return SerialHandler(port, on_message_received, on_connection_changed)
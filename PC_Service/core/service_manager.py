@@ -2,23 +2,42 @@
 Service Manager for ESP32 CYD PC Service
 Main orchestration and lifecycle management
 """
+import logging
 import time
 import threading
 from typing import Dict, Any, Optional
 from core.json_protocol import (
-    parse_message, create_system_data_message, create_status_message,
+    parse_message, create_system_data_frame, create_status_message,
     create_ack_message, MessageType, CommandType, StatusType
 )
 from core.serial_handler import SerialHandler
 from core.system_monitor import get_system_data, get_formatted_summary
+from commands.command_executor import CommandResult
 from commands.terminal_commands import open_terminal
-from commands.browser_commands import open_chrome
+from commands.browser_commands import open_chrome, prewarm_browsers
 from commands.system_commands import shutdown
 from commands.sound_commands import (
     play_alarm, play_car, play_bell, play_dog,
-    play_police, play_tick, play_modem, play_applause
+    play_police, play_tick, play_modem, play_applause,
+    preload_sounds
 )
-from config import SYSTEM_UPDATE_INTERVAL, SERVICE_NAME, VERSION
+from config import (
+    SYSTEM_UPDATE_INTERVAL, SYSTEM_UPDATE_BACKOFF, SYSTEM_UPDATE_MAX_INTERVAL,
+    SYSTEM_UPDATE_STEADY_PERCENT, SERVICE_NAME, VERSION, BROWSER_PREWARM
+)
+
+logger = logging.getLogger(__name__)
+
+# Prefixes the ESP32 uses to request actions through its debug output
+_PC_COMMAND_PREFIX = b"PC_COMMAND:"
+_PC_SOUND_PREFIX = b"PC_SOUND:"
+
+
+def _is_steady(previous: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    """Whether CPU and RAM moved less than the steady threshold"""
+    ram_threshold = current["ram_total_gb"] * SYSTEM_UPDATE_STEADY_PERCENT / 100
+    return (abs(current["cpu_percent"] - previous["cpu_percent"]) < SYSTEM_UPDATE_STEADY_PERCENT
+            and abs(current["ram_used_gb"] - previous["ram_used_gb"]) <= ram_threshold)
 
 
 class ServiceManager:
@@ -30,24 +49,52 @@ class ServiceManager:
         self.serial_handler: Optional[SerialHandler] = None
         self.system_update_thread: Optional[threading.Thread] = None
         self.last_system_update = 0
+        self._stop_event = threading.Event()
         
         # Statistics
         self.start_time = None
+        self._start_monotonic = None
         self.commands_processed = 0
         self.last_command_time = None
         
-        print(f"=== {SERVICE_NAME} v{VERSION} ===")
-        print(f"Initializing service for port: {port}")
+        # Command handlers keyed by action name
+        self._command_dispatch = {
+            CommandType.INIT: open_terminal,
+            CommandType.TEST: open_chrome,
+            CommandType.EXIT: shutdown
+        }
+        # Handlers for parsed JSON messages keyed by message type; parsed
+        # codes are plain ints, which hash equal to the enum members
+        self._message_dispatch = {
+            MessageType.COMMAND: self._handle_command_message,
+            MessageType.HEARTBEAT: self._handle_heartbeat_message
+        }
+        # Sound handlers keyed by lower-case sound name
+        self._sound_dispatch = {
+            "alarm": play_alarm,
+            "car": play_car,
+            "bell": play_bell,
+            "dog": play_dog,
+            "police": play_police,
+            "tick": play_tick,
+            "modem": play_modem,
+            "applause": play_applause
+        }
+        
+        logger.info("=== %s v%s ===", SERVICE_NAME, VERSION)
+        logger.info("Initializing service for port: %s", port)
     
     def start(self) -> bool:
         """Start the service"""
         if self.running:
-            print("Service is already running")
+            logger.info("Service is already running")
             return True
         
-        print("Starting ESP32 CYD PC Service...")
+        logger.info("Starting ESP32 CYD PC Service...")
         self.running = True
+        self._stop_event.clear()
         self.start_time = time.time()
+        self._start_monotonic = time.monotonic()
         
         # Initialize serial handler
         self.serial_handler = SerialHandler(
@@ -58,8 +105,8 @@ class ServiceManager:
         
         # Start serial communication
         if not self.serial_handler.start():
-            print(f"Failed to start serial handler on {self.port}")
-            print("Service will continue trying to connect...")
+            logger.warning("Failed to start serial handler on %s", self.port)
+            logger.info("Service will continue trying to connect...")
         
         # Start system monitoring thread
         self.system_update_thread = threading.Thread(
@@ -68,8 +115,18 @@ class ServiceManager:
         )
         self.system_update_thread.start()
         
-        print("Service started successfully!")
-        print("Waiting for ESP32 connection...")
+        # Decode sounds once so each first play starts immediately
+        loaded = preload_sounds()
+        if loaded:
+            logger.info("Preloaded %s sounds", loaded)
+        
+        # Optionally launch the browser now so the first TEST command is warm
+        if BROWSER_PREWARM:
+            result = prewarm_browsers()
+            logger.info("Browser prewarm: %s", result.message)
+        
+        logger.info("Service started successfully!")
+        logger.info("Waiting for ESP32 connection...")
         return True
     
     def stop(self):
@@ -77,8 +134,9 @@ class ServiceManager:
         if not self.running:
             return
         
-        print("Stopping ESP32 CYD PC Service...")
+        logger.info("Stopping ESP32 CYD PC Service...")
         self.running = False
+        self._stop_event.set()
         
         # Stop serial handler
         if self.serial_handler:
@@ -88,14 +146,18 @@ class ServiceManager:
         if self.system_update_thread and self.system_update_thread.is_alive():
             self.system_update_thread.join(timeout=2.0)
         
-        print("Service stopped")
+        logger.info("Service stopped")
+    
+    def wait_stopped(self, timeout: Optional[float] = None) -> bool:
+        """Block until the service stops; False if the timeout expired first"""
+        return self._stop_event.wait(timeout)
     
-    def _handle_received_message(self, raw_message: str):
+    def _handle_received_message(self, raw_message: bytes):
         """Handle messages received from ESP32"""
         # Check for PC_COMMAND: prefix in debug output
-        if raw_message.startswith("PC_COMMAND:"):
-            command = raw_message.split("PC_COMMAND:")[1].strip()
-            print(f"Received command from ESP32 debug: {command}")
+        if raw_message.startswith(_PC_COMMAND_PREFIX):
+            command = raw_message[len(_PC_COMMAND_PREFIX):].strip().decode('utf-8', errors='ignore')
+            logger.debug("Received command from ESP32 debug: %s", command)
             
             # Create a command message and handle it
             command_message = {
@@ -107,9 +169,9 @@ class ServiceManager:
             return
         
         # Check for PC_SOUND: prefix in debug output
-        if raw_message.startswith("PC_SOUND:"):
-            sound_name = raw_message.split("PC_SOUND:")[1].strip()
-            print(f"Received sound command from ESP32 debug: {sound_name}")
+        if raw_message.startswith(_PC_SOUND_PREFIX):
+            sound_name = raw_message[len(_PC_SOUND_PREFIX):].strip().decode('utf-8', errors='ignore')
+            logger.debug("Received sound command from ESP32 debug: %s", sound_name)
             
             # Create a sound message and handle it
             sound_message = {
@@ -120,36 +182,40 @@ class ServiceManager:
             self._handle_sound_message(sound_message)
             return
         
-        # Try to parse as JSON
-        message = parse_message(raw_message)
+        # Lines arrive stripped, so anything not opening with a brace is
+        # debug output and skips the JSON parser
+        message = parse_message(raw_message) if raw_message[:1] == b"{" else None
         
         if message:
             # Valid JSON message
             self._handle_json_message(message)
         else:
             # Not JSON, treat as debug output
-            print(f"ESP32 Debug: {raw_message}")
+            # Guarded so routine chatter is not decoded when nobody reads it
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("ESP32 Debug: %s", raw_message.decode('utf-8', errors='ignore'))
     
     def _handle_json_message(self, message: Dict[str, Any]):
         """Handle parsed JSON messages from ESP32"""
         message_type = message.get("type")
         
-        if message_type == MessageType.COMMAND:
-            self._handle_command_message(message)
-        elif message_type == MessageType.HEARTBEAT:
-            self._handle_heartbeat_message(message)
-        else:
-            print(f"Unknown message type: {message_type}")
+        handler = self._message_dispatch.get(message_type)
+        if handler is None:
+            logger.warning("Unknown message type: %s", message_type)
+            return
+        handler(message)
     
     def _handle_command_message(self, message: Dict[str, Any]):
         """Handle command messages from ESP32"""
         try:
             action = message.get("action")
-            timestamp = message.get("timestamp", time.time())
+            # One clock read serves the bookkeeping fields of this command
+            now = time.time()
+            timestamp = message.get("timestamp", now)
             
-            print(f"Received command: {action}")
+            logger.info("Received command: %s", action)
             self.commands_processed += 1
-            self.last_command_time = time.time()
+            self.last_command_time = now
             
             # Execute the command
             result = self._execute_command(action)
@@ -164,10 +230,10 @@ class ServiceManager:
             if self.serial_handler:
                 self.serial_handler.send_message(ack_message)
             
-            print(f"Command {action} result: {result.message}")
+            logger.info("Command %s result: %s", action, result.message)
             
         except Exception as e:
-            print(f"Error handling command message: {e}")
+            logger.error("Error handling command message: %s", e)
             # Send error acknowledgment
             if self.serial_handler:
                 error_ack = create_ack_message(
@@ -181,130 +247,113 @@ class ServiceManager:
         """Handle sound messages from ESP32"""
         try:
             sound_name = message.get("sound")
-            timestamp = message.get("timestamp", time.time())
+            now = time.time()
+            timestamp = message.get("timestamp", now)
             
-            print(f"Received sound command: {sound_name}")
+            logger.info("Received sound command: %s", sound_name)
             self.commands_processed += 1
-            self.last_command_time = time.time()
+            self.last_command_time = now
             
             # Execute the sound command
             result = self._execute_sound_command(sound_name)
             
-            print(f"Sound {sound_name} result: {result.message}")
+            logger.info("Sound %s result: %s", sound_name, result.message)
             
         except Exception as e:
-            print(f"Error handling sound message: {e}")
+            logger.error("Error handling sound message: %s", e)
     
     def _handle_heartbeat_message(self, message: Dict[str, Any]):
         """Handle heartbeat messages from ESP32"""
         timestamp = message.get("timestamp", time.time())
-        print(f"Heartbeat received from ESP32 (timestamp: {timestamp})")
+        logger.debug("Heartbeat received from ESP32 (timestamp: %s)", timestamp)
     
     def _execute_command(self, action: str):
         """Execute a command based on the action"""
-        if action == CommandType.INIT:
-            return open_terminal()
-        elif action == CommandType.TEST:
-            return open_chrome()
-        elif action == CommandType.EXIT:
-            return shutdown()
-        else:
-            from commands.command_executor import CommandResult
+        handler = self._command_dispatch.get(action)
+        if handler is None:
             return CommandResult(False, f"Unknown command: {action}")
+        return handler()
     
     def _execute_sound_command(self, sound_name: str):
         """Execute a sound command based on the sound name"""
-        sound_name_lower = sound_name.lower()
-        
-        if sound_name_lower == "alarm":
-            return play_alarm()
-        elif sound_name_lower == "car":
-            return play_car()
-        elif sound_name_lower == "bell":
-            return play_bell()
-        elif sound_name_lower == "dog":
-            return play_dog()
-        elif sound_name_lower == "police":
-            return play_police()
-        elif sound_name_lower == "tick":
-            return play_tick()
-        elif sound_name_lower == "modem":
-            return play_modem()
-        elif sound_name_lower == "applause":
-            return play_applause()
-        else:
-            from commands.command_executor import CommandResult
+        handler = self._sound_dispatch.get(sound_name.lower())
+        if handler is None:
             return CommandResult(False, f"Unknown sound: {sound_name}")
+        return handler()
     
     def _handle_connection_changed(self, connected: bool):
         """Handle serial connection state changes"""
         if connected:
-            print("ESP32 connected!")
+            logger.info("ESP32 connected!")
             # Send connection status
             status_message = create_status_message(StatusType.CONNECTED)
             if self.serial_handler:
                 self.serial_handler.send_message(status_message)
         else:
-            print("ESP32 disconnected!")
+            logger.info("ESP32 disconnected!")
     
     def _system_update_loop(self):
         """Background thread that sends system updates to ESP32"""
-        while self.running:
+        # The first update goes out immediately; the wait doubles as sleep
+        # and stop signal
+        wait_time = 0
+        last_sent = None
+        while not self._stop_event.wait(wait_time):
             try:
-                current_time = time.time()
-                
-                # Check if it's time to send system update
-                if current_time - self.last_system_update >= SYSTEM_UPDATE_INTERVAL:
-                    self._send_system_update()
-                    self.last_system_update = current_time
+                sent = self._send_system_update()
+                self.last_system_update = time.time()
                 
-                # Sleep for a short time to prevent busy waiting
-                time.sleep(1.0)
+                # Back off while the load is steady and snap back to the
+                # base interval as soon as it moves
+                if sent is not None and last_sent is not None and _is_steady(last_sent, sent):
+                    wait_time = min(wait_time * SYSTEM_UPDATE_BACKOFF,
+                                    SYSTEM_UPDATE_MAX_INTERVAL)
+                else:
+                    wait_time = SYSTEM_UPDATE_INTERVAL
+                if sent is not None:
+                    last_sent = sent
                 
             except Exception as e:
-                print(f"Error in system update loop: {e}")
-                time.sleep(5.0)  # Wait longer on error
+                logger.error("Error in system update loop: %s", e)
+                wait_time = 5.0  # Wait longer on error
     
-    def _send_system_update(self):
-        """Send system information to ESP32"""
+    def _send_system_update(self) -> Optional[Dict[str, Any]]:
+        """Send system information to ESP32, returning the data sent"""
         try:
-            # Get system data
-            system_data = get_system_data()
+            # Send via serial connection (this goes to ESP32's USB serial)
+            if not (self.serial_handler and self.serial_handler.is_connected):
+                # Nobody to show it to; skip the psutil calls as well
+                logger.debug("No serial connection - system data not sent")
+                return None
             
-            # Create minimal optimized JSON (remove timestamp, shorten field names)
-            minimal_data = {
-                "type": "system_data",
-                "date": system_data["date"],
-                "time": system_data["time"],
-                "cpu": system_data["cpu_percent"],
-                "ram_used": system_data["ram_used_gb"],
-                "ram_total": system_data["ram_total_gb"],
-                "net_up": system_data["network_sent_mb"],
-                "net_down": system_data["network_recv_mb"]
-            }
+            # Under backpressure an older snapshot is still queued; skip
+            # this one rather than pile up stale frames behind it
+            if self.serial_handler.queue_size:
+                logger.debug("Serial output backed up - system update skipped")
+                return None
             
-            # Send via serial connection (this goes to ESP32's USB serial)
-            if self.serial_handler and self.serial_handler.is_connected:
-                # Send ONLY ONE optimized message with explicit newline
-                import json
-                import time
-                message = json.dumps(minimal_data)
-                self.serial_handler.send_message(message)  # SerialHandler adds \n automatically
-                time.sleep(0.5)  # Add 500ms delay after sending to prevent transmission overlap
-                print("System data sent to ESP32 via serial (with delay)")
-            else:
-                print("No serial connection - system data not sent")
+            # Sample only once the frame is certain to be sent
+            system_data = get_system_data()
+            
+            # Minimal frame: no timestamp, short field names, compact JSON
+            message = create_system_data_frame(system_data)
+            self.serial_handler.send_message(message)
+            logger.debug("System data sent to ESP32 via serial")
             
             # Log summary
-            summary = get_formatted_summary()
-            print(f"System update sent: {summary}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("System update sent: %s", get_formatted_summary())
+            
+            return system_data
             
         except Exception as e:
-            print(f"Error sending system update: {e}")
+            logger.error("Error sending system update: %s", e)
+            return None
     
     def get_status(self) -> Dict[str, Any]:
         """Get service status information"""
-        uptime = time.time() - self.start_time if self.start_time else 0
+        # Measured on the monotonic clock so wall-clock steps don't skew it
+        uptime = time.monotonic() - self._start_monotonic if self._start_monotonic else 0
         
         status = {
             "service_name": SERVICE_NAME,
@@ -328,14 +377,14 @@ class ServiceManager:
         if self.serial_handler:
             test_message = create_status_message(StatusType.READY, "Test message from PC")
             self.serial_handler.send_message(test_message)
-            print("Test message sent to ESP32")
+            logger.info("Test message sent to ESP32")
         else:
-            print("No serial handler available")
+            logger.warning("No serial handler available")
     
     def force_system_update(self):
         """Force an immediate system update"""
         self._send_system_update()
-        print("System update sent immediately")
+        logger.info("System update sent immediately")
     
     def change_port(self, new_port: str) -> bool:
         """Change the serial port"""
@@ -343,7 +392,7 @@ class ServiceManager:
             success = self.serial_handler.change_port(new_port)
             if success:
                 self.port = new_port
-                print(f"Port changed to {new_port}")
+                logger.info("Port changed to %s", new_port)
             return success
         return False
 
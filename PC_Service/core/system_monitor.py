@@ -2,11 +2,21 @@
 System Monitor for ESP32 CYD PC Service
 Collects system information (CPU, RAM, Network) for display on ESP32
 """
+import logging
 import psutil
+import socket
 import time
 from datetime import datetime
-from typing import Dict, Any
-from config import CPU_SAMPLE_INTERVAL
+from typing import Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds a collected sample may be reused for the log summary
+_SUMMARY_MAX_AGE = 2.0
+
+# Byte-to-unit factors, applied as multiplications
+_PER_GB = 1.0 / (1024**3)
+_PER_MB = 1.0 / (1024**2)
 
 
 class SystemMonitor:
@@ -15,55 +25,102 @@ class SystemMonitor:
     def __init__(self):
         self.last_network_stats = None
         self.last_network_time = None
+        self._last_data = None
+        self._last_data_time = 0.0
+        self._initialize_static_info()
         self._initialize_network_baseline()
+        self._initialize_cpu_baseline()
+    
+    def _initialize_static_info(self):
+        """Capture values that cannot change while the service runs"""
+        try:
+            self._total_ram_gb = round(psutil.virtual_memory().total * _PER_GB, 1)
+        except Exception:
+            self._total_ram_gb = None
+        try:
+            self._boot_time = datetime.fromtimestamp(psutil.boot_time())
+        except Exception:
+            self._boot_time = None
+        try:
+            self._hostname = socket.gethostname()
+        except Exception:
+            self._hostname = "Unknown"
     
     def _initialize_network_baseline(self):
         """Initialize network statistics baseline"""
         try:
             self.last_network_stats = psutil.net_io_counters()
-            self.last_network_time = time.time()
+            # Monotonic: rates stay sane across NTP steps and DST changes
+            self.last_network_time = time.monotonic()
         except Exception:
             self.last_network_stats = None
             self.last_network_time = None
     
+    def _initialize_cpu_baseline(self):
+        """Prime psutil so the first non-blocking CPU reading is meaningful"""
+        try:
+            psutil.cpu_percent(interval=None)
+        except Exception:
+            pass
+    
     def get_system_data(self) -> Dict[str, Any]:
         """
         Collect all system information
         Returns formatted data ready for ESP32 display
         """
-        current_time = datetime.now()
+        # One clock read shared by both fields
+        current_time = time.localtime()
+        ram_used_gb, ram_total_gb = self._get_ram_used_total()
+        network = self.get_network_usage()
         
         data = {
-            "date": current_time.strftime("%Y-%m-%d"),
-            "time": current_time.strftime("%H:%M:%S"),
+            "date": time.strftime("%Y-%m-%d", current_time),
+            "time": time.strftime("%H:%M:%S", current_time),
             "cpu_percent": self.get_cpu_usage(),
-            "ram_used_gb": self.get_ram_usage()["used_gb"],
-            "ram_total_gb": self.get_ram_usage()["total_gb"],
-            "network_sent_mb": self.get_network_usage()["sent_mb"],
-            "network_recv_mb": self.get_network_usage()["recv_mb"]
+            "ram_used_gb": ram_used_gb,
+            "ram_total_gb": ram_total_gb,
+            "network_sent_mb": network["sent_mb"],
+            "network_recv_mb": network["recv_mb"]
         }
         
+        self._last_data = data
+        self._last_data_time = time.monotonic()
         return data
     
     def get_cpu_usage(self) -> float:
         """Get CPU usage percentage"""
         try:
-            # Get CPU percentage with a short interval for accuracy
-            cpu_percent = psutil.cpu_percent(interval=CPU_SAMPLE_INTERVAL)
+            # Non-blocking: usage averaged since the previous call, which
+            # matches the update cadence
+            cpu_percent = psutil.cpu_percent(interval=None)
             return round(cpu_percent, 1)
         except Exception as e:
-            print(f"Error getting CPU usage: {e}")
+            logger.error("Error getting CPU usage: %s", e)
             return 0.0
     
+    def _get_ram_used_total(self) -> Tuple[float, float]:
+        """Used and installed RAM in GB, the only memory fields sent per update"""
+        try:
+            memory = psutil.virtual_memory()
+            total_gb = self._total_ram_gb
+            if total_gb is None:
+                total_gb = round(memory.total * _PER_GB, 1)
+            return round(memory.used * _PER_GB, 1), total_gb
+        except Exception as e:
+            logger.error("Error getting RAM usage: %s", e)
+            return 0.0, 0.0
+    
     def get_ram_usage(self) -> Dict[str, float]:
         """Get RAM usage information"""
         try:
             memory = psutil.virtual_memory()
             
-            # Convert bytes to GB
-            total_gb = round(memory.total / (1024**3), 1)
-            used_gb = round(memory.used / (1024**3), 1)
-            available_gb = round(memory.available / (1024**3), 1)
+            # Convert bytes to GB; installed RAM is read once at startup
+            total_gb = self._total_ram_gb
+            if total_gb is None:
+                total_gb = round(memory.total * _PER_GB, 1)
+            used_gb = round(memory.used * _PER_GB, 1)
+            available_gb = round(memory.available * _PER_GB, 1)
             percent = round(memory.percent, 1)
             
             return {
@@ -73,7 +130,7 @@ class SystemMonitor:
                 "percent": percent
             }
         except Exception as e:
-            print(f"Error getting RAM usage: {e}")
+            logger.error("Error getting RAM usage: %s", e)
             return {
                 "total_gb": 0.0,
                 "used_gb": 0.0,
@@ -85,12 +142,12 @@ class SystemMonitor:
         """Get network usage information (cumulative since boot)"""
         try:
             current_stats = psutil.net_io_counters()
-            current_time = time.time()
+            current_time = time.monotonic()
             
             if current_stats:
                 # Convert bytes to MB
-                sent_mb = round(current_stats.bytes_sent / (1024**2), 1)
-                recv_mb = round(current_stats.bytes_recv / (1024**2), 1)
+                sent_mb = round(current_stats.bytes_sent * _PER_MB, 1)
+                recv_mb = round(current_stats.bytes_recv * _PER_MB, 1)
                 
                 # Calculate rates if we have previous data
                 sent_rate_mbps = 0.0
@@ -125,7 +182,7 @@ class SystemMonitor:
                 }
                 
         except Exception as e:
-            print(f"Error getting network usage: {e}")
+            logger.error("Error getting network usage: %s", e)
             return {
                 "sent_mb": 0.0,
                 "recv_mb": 0.0,
@@ -152,7 +209,7 @@ class SystemMonitor:
                 "path": path
             }
         except Exception as e:
-            print(f"Error getting disk usage for {path}: {e}")
+            logger.error("Error getting disk usage for %s: %s", path, e)
             return {
                 "total_gb": 0.0,
                 "used_gb": 0.0,
@@ -164,11 +221,13 @@ class SystemMonitor:
     def get_system_info(self) -> Dict[str, Any]:
         """Get general system information"""
         try:
-            boot_time = datetime.fromtimestamp(psutil.boot_time())
+            boot_time = self._boot_time
+            if boot_time is None:
+                boot_time = datetime.fromtimestamp(psutil.boot_time())
             uptime = datetime.now() - boot_time
             
             return {
-                "hostname": psutil.os.uname().nodename if hasattr(psutil.os, 'uname') else "Unknown",
+                "hostname": self._hostname,
                 "platform": psutil.os.name,
                 "boot_time": boot_time.strftime("%Y-%m-%d %H:%M:%S"),
                 "uptime_days": uptime.days,
@@ -176,7 +235,7 @@ class SystemMonitor:
                 "uptime_minutes": (uptime.seconds % 3600) // 60
             }
         except Exception as e:
-            print(f"Error getting system info: {e}")
+            logger.error("Error getting system info: %s", e)
             return {
                 "hostname": "Unknown",
                 "platform": "Unknown",
@@ -188,7 +247,10 @@ class SystemMonitor:
     
     def get_formatted_summary(self) -> str:
         """Get a formatted summary string for logging"""
-        data = self.get_system_data()
+        # Reuse a fresh sample, e.g. the one just sent to the ESP32
+        data = self._last_data
+        if data is None or time.monotonic() - self._last_data_time > _SUMMARY_MAX_AGE:
+            data = self.get_system_data()
         return (f"CPU: {data['cpu_percent']}% | "
                 f"RAM: {data['ram_used_gb']}/{data['ram_total_gb']}GB | "
                 f"NET: ↑{data['network_sent_mb']}MB ↓{data['network_recv_mb']}MB")
@@ -5,9 +5,14 @@ Handles ESP32 display communication and PC command execution
 import sys
 import signal
 import argparse
-import time
+import logging
+import os
+from logging.handlers import RotatingFileHandler
 from core.service_manager import create_service_manager
-from config import DEFAULT_SERIAL_PORT, SERVICE_NAME, VERSION
+from config import (
+    DEFAULT_SERIAL_PORT, SERVICE_NAME, VERSION, LOG_LEVEL, LOG_TO_FILE,
+    LOG_FILE, LOG_DIR, MAX_LOG_SIZE, LOG_BACKUP_COUNT, init_log_dir
+)
 
 
 def signal_handler(signum, frame):
@@ -19,6 +24,24 @@ def signal_handler(signum, frame):
     sys.exit(0)
 
 
+def setup_logging(verbose: bool = False):
+    """Configure service logging"""
+    handlers = [logging.StreamHandler()]
+    if LOG_TO_FILE:
+        handlers.append(RotatingFileHandler(
+            os.path.join(LOG_DIR, LOG_FILE),
+            maxBytes=MAX_LOG_SIZE,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8"
+        ))
+    
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else getattr(logging, LOG_LEVEL, logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=handlers
+    )
+
+
 def print_banner():
     """Print service banner"""
     print("=" * 60)
@@ -112,6 +135,7 @@ Examples:
   python main.py                    # Use default port (COM7)
   python main.py --port COM8        # Use specific port
   python main.py --no-interactive   # Run without interactive mode
+  python main.py --verbose          # Include debug logging
         """
     )
     
@@ -127,6 +151,12 @@ Examples:
         help="Disable interactive command mode"
     )
     
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log debug output, including every message exchanged with the ESP32"
+    )
+    
     parser.add_argument(
         "--version", "-v",
         action="version",
@@ -137,6 +167,8 @@ Examples:
     
     # Print banner
     print_banner()
+    init_log_dir()
+    setup_logging(args.verbose)
     
     # Setup signal handlers
     signal.signal(signal.SIGINT, signal_handler)
@@ -150,15 +182,22 @@ Examples:
             print("Failed to start service")
             return 1
         
-        # Run interactive mode or just wait
-        if not args.no_interactive:
+        # Run interactive mode or just wait. Without a terminal (pipes,
+        # nohup, service wrappers) input() would hit EOF or block, so fall
+        # back to background mode automatically.
+        interactive = (not args.no_interactive and sys.stdin is not None
+                       and sys.stdin.isatty())
+        if interactive:
             interactive_mode(service_manager)
         else:
             print("Service running in background mode...")
             print("Press Ctrl+C to stop")
             try:
-                while service_manager.running:
-                    time.sleep(1)
+                # Returns as soon as stop() runs. The timeout only keeps
+                # Ctrl+C responsive on Windows, where an untimed wait can't
+                # be interrupted.
+                while not service_manager.wait_stopped(1.0):
+                    pass
             except KeyboardInterrupt:
                 pass
         
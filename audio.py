@@ -8,6 +8,9 @@ from machine import Pin, PWM
 # Audio pin configuration
 SPEAKER_PIN = 26
 
+# Per-tone trace output; off by default since print() blocks on USB
+DEBUG = False
+
 class AudioManager:
     """Manages audio output via PWM speaker"""
     
@@ -19,7 +22,9 @@ class AudioManager:
     def init_speaker(self):
         """Initialize the PWM speaker"""
         try:
-            self.pwm = PWM(self.speaker_pin)
+            # One PWM channel for the life of the app; tones only change its
+            # frequency and duty. Start silent.
+            self.pwm = PWM(self.speaker_pin, freq=440, duty=0)
             print("Speaker initialized on Pin", SPEAKER_PIN)
             return True
         except Exception as e:
@@ -36,13 +41,13 @@ class AudioManager:
         """
         try:
             self.is_playing = True
-            print(f"Playing tone: {frequency}Hz for {duration_ms}ms")
-            
-            # Reinitialize PWM for each tone to avoid conflicts
-            if self.pwm:
-                self.pwm.deinit()
+            if DEBUG:
+                print(f"Playing tone: {frequency}Hz for {duration_ms}ms")
             
-            self.pwm = PWM(self.speaker_pin)
+            # Reuse the running channel; deinit/PWM() per tone reallocates
+            # the LEDC timer and delays short tones
+            if self.pwm is None and not self.init_speaker():
+                return
             
             # Set frequency and duty cycle (50% for clear tone)
             self.pwm.freq(frequency)
@@ -53,7 +58,8 @@ class AudioManager:
             
             # Stop the tone
             self.stop_tone()
-            print("Tone completed")
+            if DEBUG:
+                print("Tone completed")
             
         except Exception as e:
             print("Error playing tone:", e)
@@ -70,33 +76,39 @@ class AudioManager:
     
     def play_startup_tone(self):
         """Play startup tone - A3 (220Hz) for 200ms"""
-        print("Playing startup tone...")
+        if DEBUG:
+            print("Playing startup tone...")
         self.play_tone(220, 50)  # A3 note (220Hz as requested)
     
     def play_button_click_tone(self):
         """Play button click tone - A4 (440Hz) for 200ms"""
-        print("Playing button click tone...")
+        if DEBUG:
+            print("Playing button click tone...")
         self.play_tone(440, 200)  # A4 note (440Hz as requested)
     
     def play_error_tone(self):
         """Play error tone - Low frequency for errors"""
-        print("Playing error tone...")
+        if DEBUG:
+            print("Playing error tone...")
         self.play_tone(220, 500)  # Lower A note for errors
     
     def play_success_tone(self):
         """Play success tone - Two quick high tones"""
-        print("Playing success tone...")
+        if DEBUG:
+            print("Playing success tone...")
         self.play_tone(880, 100)
         time.sleep_ms(50)
         self.play_tone(1108, 100)  # C6 note
     
-    def play_melody(self, notes, durations):
+    def play_melody(self, notes, durations, gap_ms=0):
         """
         Play a melody with specified notes and durations
         
         Args:
             notes (list): List of frequencies in Hz
             durations (list): List of durations in milliseconds
+            gap_ms (int): Silence after each note in milliseconds; rests
+                in the melody already separate notes that need it
         """
         if len(notes) != len(durations):
             print("Notes and durations lists must be the same length")
@@ -107,7 +119,8 @@ class AudioManager:
                 self.play_tone(note, duration)
             else:
                 time.sleep_ms(duration)
-            time.sleep_ms(50)  # Small gap between notes
+            if gap_ms:
+                time.sleep_ms(gap_ms)
     
     def cleanup(self):
         """Clean up PWM resources"""
@@ -115,6 +128,7 @@ class AudioManager:
             try:
                 self.stop_tone()
                 self.pwm.deinit()
+                self.pwm = None
                 print("Speaker PWM cleaned up")
             except Exception as e:
                 print("Error cleaning up speaker:", e)
@@ -169,36 +183,45 @@ class Notes:
     REST = 0  # Silence/pause
 
 
-# Predefined melodies
+# Predefined melodies as (notes, durations); built once at import so the
+# Notes lookups and tuple construction don't happen on every call
+_STARTUP = ((Notes.A4,), (200,))
+_BUTTON_CLICK = ((Notes.A5,), (200,))
+_SUCCESS = ((Notes.C5, Notes.E5, Notes.G5), (100, 100, 200))
+_ERROR = ((Notes.A4, Notes.REST, Notes.A4), (150, 50, 150))
+_POWER_ON = ((Notes.C4, Notes.E4, Notes.G4, Notes.C5), (100, 100, 100, 300))
+_POWER_OFF = ((Notes.C5, Notes.G4, Notes.E4, Notes.C4), (100, 100, 100, 300))
+
+
 class Melodies:
     """Predefined melodies for common events"""
     
     @staticmethod
     def startup():
         """Startup melody"""
-        return [Notes.A4], [200]
+        return _STARTUP
     
     @staticmethod
     def button_click():
         """Button click sound"""
-        return [Notes.A5], [200]
+        return _BUTTON_CLICK
     
     @staticmethod
     def success():
         """Success melody"""
-        return [Notes.C5, Notes.E5, Notes.G5], [100, 100, 200]
+        return _SUCCESS
     
     @staticmethod
     def error():
         """Error melody"""
-        return [Notes.A4, Notes.REST, Notes.A4], [150, 50, 150]
+        return _ERROR
     
     @staticmethod
     def power_on():
         """Power on melody"""
-        return [Notes.C4, Notes.E4, Notes.G4, Notes.C5], [100, 100, 100, 300]
+        return _POWER_ON
     
     @staticmethod
     def power_off():
         """Power off melody"""
-        return [Notes.C5, Notes.G4, Notes.E4, Notes.C4], [100, 100, 100, 300]
+        return _POWER_OFF
@@ -3,7 +3,53 @@ Button module for ESP32-2432S028R (Cheap Yellow Display)
 Handles button creation, rendering, and touch detection
 Updated for new ili9341 Display API
 """
-from ili9341 import color565
+from array import array
+from framebuf import FrameBuffer, RGB565
+from micropython import const
+
+# Color constants as raw RGB565 values (what color565() returns), so no
+# conversion or class lookup happens at runtime
+BLACK = const(0x0000)
+WHITE = const(0xFFFF)
+RED = const(0xF800)
+GREEN = const(0x07E0)
+BLUE = const(0x001F)
+YELLOW = const(0xFFE0)
+CYAN = const(0x07FF)
+MAGENTA = const(0xF81F)
+
+# Button specific colors
+BUTTON_BG = const(0x4208)       # Dark gray, color565(64, 64, 64)
+BUTTON_PRESSED = const(0x8410)  # Medium gray, color565(128, 128, 128)
+BUTTON_BORDER = WHITE           # White border
+BUTTON_TEXT = BLACK             # Black text
+
+# Label cell size; characters are 8x8 glyphs spaced 12 px apart to read larger
+CHAR_WIDTH = 12
+CHAR_HEIGHT = 16
+
+
+# Rows composed offscreen per block write; 16 rows of a 320 px button is 10 KB
+BAND_ROWS = 16
+
+# Scratch pixels shared by all buttons, grown to the widest button drawn
+_band_buf = bytearray(0)
+
+
+def _swap565(color):
+    """Swap RGB565 bytes to correct for framebuf endianness"""
+    return ((color & 0xFF) << 8) | ((color & 0xFF00) >> 8)
+
+
+def _band(width):
+    """Scratch buffer holding BAND_ROWS rows of the given width"""
+    global _band_buf
+    size = width * BAND_ROWS * 2
+    if len(_band_buf) < size:
+        _band_buf = None  # Let the old buffer go before allocating
+        _band_buf = bytearray(size)
+    return _band_buf
+
 
 class Button:
     def __init__(self, x, y, width, height, text, text_color=None, bg_color=None, border_color=None, pressed_color=None):
@@ -23,14 +69,33 @@ class Button:
         self.y = y
         self.width = width
         self.height = height
-        self.text = text
-        self.text_color = text_color or color565(0, 0, 0)  # Black
-        self.bg_color = bg_color or color565(64, 64, 64)  # Dark gray
-        self.border_color = border_color or color565(255, 255, 255)  # White
-        self.pressed_color = pressed_color or color565(128, 128, 128)  # Medium gray
+        self.text_color = text_color or BUTTON_TEXT
+        self.bg_color = bg_color or BUTTON_BG
+        self.border_color = border_color or BUTTON_BORDER
+        self.pressed_color = pressed_color or BUTTON_PRESSED
+        self.text = text  # Also lays out and renders the label
         self.is_pressed = False
         self.callback = None
         
+    @property
+    def text(self):
+        """Button text"""
+        return self._text
+    
+    @text.setter
+    def text(self, text):
+        """Set the button text and redo the label layout"""
+        self._text = text
+        
+        # Calculate text position (centered, relative to the button) once
+        # instead of on every draw
+        self._text_x = (self.width - len(text) * CHAR_WIDTH) // 2
+        self._text_y = (self.height - CHAR_HEIGHT) // 2
+        
+        # Label pixels for each state, rendered once; a whole-button buffer
+        # would not fit in RAM for a full menu
+        self._label, self._label_pressed = self._render_labels()
+        
     def set_callback(self, callback):
         """Set callback function to be called when button is clicked"""
         self.callback = callback
@@ -41,44 +106,76 @@ class Button:
                 self.y <= y <= self.y + self.height)
     
     def draw(self, display):
-        """Draw the button on the display using new Display API"""
-        # Choose colors based on pressed state
-        bg = self.pressed_color if self.is_pressed else self.bg_color
+        """Draw the button on the display using new Display API
         
-        # Draw button background using fill_rectangle
-        display.fill_rectangle(self.x, self.y, self.width, self.height, bg)
-        
-        # Draw border using draw_rectangle
-        display.draw_rectangle(self.x, self.y, self.width, self.height, self.border_color)
-        
-        # Calculate text position (centered) for larger text
-        # Use larger character spacing to simulate bigger text
-        char_width = 12  # Increased from 8 to make text appear larger
-        char_height = 16  # Increased from 8 to make text appear larger
+        Background, border and label are composed offscreen and sent in
+        bands of BAND_ROWS rows, one block write each
+        """
+        # Choose colors based on pressed state
+        bg = _swap565(self.pressed_color if self.is_pressed else self.bg_color)
+        border = _swap565(self.border_color)
+        label = self._label_pressed if self.is_pressed else self._label
         
-        # Calculate text dimensions
-        text_width = len(self.text) * char_width
-        text_height = char_height
-        text_x = self.x + (self.width - text_width) // 2
-        text_y = self.y + (self.height - text_height) // 2
+        # Locals for everything the band loop touches; attribute lookups
+        # are dictionary searches on MicroPython
+        width = self.width
+        height = self.height
+        x = self.x
+        y = self.y
+        text_x = self._text_x
+        text_y = self._text_y
+        buf = _band(width)
+        fbuf = FrameBuffer(buf, width, BAND_ROWS, RGB565)
+        fill = fbuf.fill
+        rect = fbuf.rect
+        blit = fbuf.blit
+        draw_sprite = display.draw_sprite
+        pixels = memoryview(buf)
+        row_bytes = width * 2
+        for top in range(0, height, BAND_ROWS):
+            rows = min(BAND_ROWS, height - top)
+            fill(bg)
+            # Shapes are placed in button coordinates shifted up by the band
+            # top; framebuf clips whatever falls outside the band
+            rect(0, -top, width, height, border)
+            if label:
+                blit(label, text_x, text_y - top)
+            draw_sprite(pixels[:row_bytes * rows], x, y + top, width, rows)
+    
+    def _render_labels(self):
+        """Render the label text into RGB565 framebuffers for both states"""
+        width = len(self._text) * CHAR_WIDTH
+        if not width:
+            return None, None
+        bg = _swap565(self.bg_color)
+        normal = bytearray(width * 16)  # 8 rows, 2 bytes per pixel
+        fbuf = FrameBuffer(normal, width, 8, RGB565)
+        fbuf.fill(bg)
+        color = _swap565(self.text_color)
+        for i, char in enumerate(self._text):
+            char_x = i * CHAR_WIDTH
+            # Bold effect: the glyph ORed in again one pixel right
+            fbuf.text(char, char_x, 0, color)
+            fbuf.text(char, char_x + 1, 0, color)
         
-        # Draw each character individually with larger spacing
-        for i, char in enumerate(self.text):
-            char_x = text_x + i * char_width
-            
-            # Draw the character with bold effect (slight offset)
-            display.draw_text8x8(char_x, text_y, char, self.text_color, bg)
-            display.draw_text8x8(char_x + 1, text_y, char, self.text_color, bg)  # Bold effect
+        # The pressed label reuses the bold glyphs: one blit over the
+        # pressed background with the normal background keyed out
+        pressed = bytearray(width * 16)
+        pressed_fbuf = FrameBuffer(pressed, width, 8, RGB565)
+        pressed_fbuf.fill(_swap565(self.pressed_color))
+        pressed_fbuf.blit(fbuf, 0, 0, bg)
+        return fbuf, pressed_fbuf
     
     def set_pressed(self, pressed):
-        """Set the pressed state of the button"""
+        """Set the pressed state of the button; returns True if it changed"""
+        changed = self.is_pressed != pressed
         self.is_pressed = pressed
+        return changed
     
     def handle_click(self):
         """Handle button click - call callback if set"""
         if self.callback:
             self.callback(self)
-        print(f"Button '{self.text}' clicked!")
 
 
 class ButtonManager:
@@ -86,41 +183,78 @@ class ButtonManager:
         """Initialize button manager"""
         self.buttons = []
         self.pressed_button = None
+        self._by_text = {}  # text -> first button with that text
+        self._clear_bounds()
+    
+    def _clear_bounds(self):
+        """Reset the hit-test bounds, stored per edge parallel to self.buttons"""
+        self._xs = array('h')
+        self._ys = array('h')
+        self._x2s = array('h')
+        self._y2s = array('h')
         
     def add_button(self, button):
         """Add a button to the manager"""
         self.buttons.append(button)
+        self._by_text.setdefault(button.text, button)
+        self._xs.append(button.x)
+        self._ys.append(button.y)
+        self._x2s.append(button.x + button.width)
+        self._y2s.append(button.y + button.height)
+    
+    def clear(self):
+        """Remove all buttons"""
+        self.buttons.clear()
+        self._by_text.clear()
+        self._clear_bounds()
+        self.pressed_button = None
+    
+    def _hit_index(self, x, y):
+        """Index of the first button containing the point, or -1"""
+        # Same test as Button.contains_point, on flat arrays instead of
+        # four attribute lookups per button
+        xs = self._xs
+        ys = self._ys
+        x2s = self._x2s
+        y2s = self._y2s
+        for i in range(len(xs)):
+            if xs[i] <= x <= x2s[i] and ys[i] <= y <= y2s[i]:
+                return i
+        return -1
         
-    def create_full_width_buttons(self, display_width, display_height, button_texts, 
-                                 text_color=None, bg_color=None, border_color=None):
+    def create_buttons(self, button_width, display_height, button_texts,
+                       text_color=None, bg_color=None, border_color=None):
         """
-        Create full-width buttons that divide the screen vertically
+        Create a column of buttons from the left edge that divide the height
         
         Args:
-            display_width: Width of the display
-            display_height: Height of the display
+            button_width: Width of each button
+            display_height: Height to divide between the buttons
             button_texts: List of button text strings
             text_color: Text color for all buttons
             bg_color: Background color for all buttons
             border_color: Border color for all buttons
         """
-        num_buttons = len(button_texts)
-        button_height = display_height // num_buttons
+        # Spread the leftover rows one each over the first buttons instead of
+        # piling them all onto the last one
+        button_height, extra_rows = divmod(display_height, len(button_texts))
         
+        y = 0
         for i, text in enumerate(button_texts):
-            y = i * button_height
-            # Make sure the last button fills any remaining space
-            if i == num_buttons - 1:
-                height = display_height - y
-            else:
-                height = button_height
-                
-            button = Button(0, y, display_width, height, text, 
+            height = button_height + (i < extra_rows)
+            button = Button(0, y, button_width, height, text, 
                           text_color, bg_color, border_color)
             self.add_button(button)
+            y += height
             
         return self.buttons
     
+    def create_full_width_buttons(self, display_width, display_height, button_texts, 
+                                 text_color=None, bg_color=None, border_color=None):
+        """Create full-width buttons that divide the screen vertically"""
+        return self.create_buttons(display_width, display_height, button_texts,
+                                   text_color, bg_color, border_color)
+    
     def draw_all(self, display):
         """Draw all buttons on the display"""
         for button in self.buttons:
@@ -128,44 +262,47 @@ class ButtonManager:
     
     def handle_touch_down(self, x, y):
         """Handle touch down event - find and press button"""
-        for button in self.buttons:
-            if button.contains_point(x, y):
-                button.set_pressed(True)
-                self.pressed_button = button
-                return button
-        return None
+        index = self._hit_index(x, y)
+        if index < 0:
+            return None
+        button = self.buttons[index]
+        button.set_pressed(True)
+        self.pressed_button = button
+        return button
     
     def handle_touch_up(self, x, y):
         """Handle touch up event - release button and trigger click if still over button"""
         clicked_button = None
         
         if self.pressed_button:
-            # Check if touch up is still over the same button
-            if self.pressed_button.contains_point(x, y):
-                self.pressed_button.handle_click()
-                clicked_button = self.pressed_button
+            button = self.pressed_button
             
-            # Release the button
-            self.pressed_button.set_pressed(False)
+            # Release the button first so the callback sees (and can
+            # redraw) the released state
+            button.set_pressed(False)
             self.pressed_button = None
             
+            # Check if touch up is still over the same button
+            if button.contains_point(x, y):
+                button.handle_click()
+                clicked_button = button
+            
         return clicked_button
     
     def handle_touch_move(self, x, y):
-        """Handle touch move event - update button states"""
+        """Handle touch move event - update button states
+        
+        Returns True if the pressed button changed state and needs redrawing
+        """
         if self.pressed_button:
             # Check if still over the pressed button
-            if self.pressed_button.contains_point(x, y):
-                self.pressed_button.set_pressed(True)
-            else:
-                self.pressed_button.set_pressed(False)
+            return self.pressed_button.set_pressed(
+                self.pressed_button.contains_point(x, y))
+        return False
     
     def get_button_by_text(self, text):
         """Get button by its text"""
-        for button in self.buttons:
-            if button.text == text:
-                return button
-        return None
+        return self._by_text.get(text)
     
     def clear_all_pressed(self):
         """Clear pressed state from all buttons"""
@@ -174,27 +311,27 @@ class ButtonManager:
         self.pressed_button = None
 
 
-# Color constants for buttons using color565 function
+# Color constants grouped by name; kept for callers that use ButtonColors.X
 class ButtonColors:
     # Basic colors
-    BLACK = color565(0, 0, 0)
-    WHITE = color565(255, 255, 255)
-    RED = color565(255, 0, 0)
-    GREEN = color565(0, 255, 0)
-    BLUE = color565(0, 0, 255)
-    YELLOW = color565(255, 255, 0)
-    CYAN = color565(0, 255, 255)
-    MAGENTA = color565(255, 0, 255)
+    BLACK = BLACK
+    WHITE = WHITE
+    RED = RED
+    GREEN = GREEN
+    BLUE = BLUE
+    YELLOW = YELLOW
+    CYAN = CYAN
+    MAGENTA = MAGENTA
     
     # Button specific colors
-    BUTTON_BG = color565(64, 64, 64)      # Dark gray
-    BUTTON_PRESSED = color565(128, 128, 128)  # Medium gray
-    BUTTON_BORDER = color565(255, 255, 255)   # White border
-    BUTTON_TEXT = color565(0, 0, 0)       # Black text
+    BUTTON_BG = BUTTON_BG
+    BUTTON_PRESSED = BUTTON_PRESSED
+    BUTTON_BORDER = BUTTON_BORDER
+    BUTTON_TEXT = BUTTON_TEXT
     
     # Themed button colors
-    INIT_COLOR = color565(0, 255, 0)      # Green
-    SETUP_COLOR = color565(0, 0, 255)     # Blue
-    TEST_COLOR = color565(255, 255, 0)    # Yellow
-    CALIBRATE_COLOR = color565(255, 0, 255) # Magenta
-    EXIT_COLOR = color565(255, 0, 0)      # Red
+    INIT_COLOR = GREEN
+    SETUP_COLOR = BLUE
+    TEST_COLOR = YELLOW
+    CALIBRATE_COLOR = MAGENTA
+    EXIT_COLOR = RED
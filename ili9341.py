@@ -127,6 +127,8 @@ class Display(object):
         self.offset = bool(x_offset or y_offset)
         self.x_offset = x_offset
         self.y_offset = y_offset
+        # Last column/page window sent; -1 forces the next block to send both
+        self._x0 = self._x1 = self._y0 = self._y1 = -1
 
         # Initialize GPIO pins and set implementation specific methods
         if implementation.name == 'circuitpython':
@@ -193,10 +195,19 @@ class Display(object):
             y0 += self.y_offset
             y1 += self.y_offset
 
-        self.write_cmd(self.SET_COLUMN,
-                       x0 >> 8, x0 & 0xff, x1 >> 8, x1 & 0xff)
-        self.write_cmd(self.SET_PAGE,
-                       y0 >> 8, y0 & 0xff, y1 >> 8, y1 & 0xff)
+        # The controller keeps the address window between writes, so only
+        # send the extents that changed (rows of text share a page, stacked
+        # fill chunks share columns)
+        if x0 != self._x0 or x1 != self._x1:
+            self.write_cmd(self.SET_COLUMN,
+                           x0 >> 8, x0 & 0xff, x1 >> 8, x1 & 0xff)
+            self._x0 = x0
+            self._x1 = x1
+        if y0 != self._y0 or y1 != self._y1:
+            self.write_cmd(self.SET_PAGE,
+                           y0 >> 8, y0 & 0xff, y1 >> 8, y1 & 0xff)
+            self._y0 = y0
+            self._y1 = y1
         self.write_cmd(self.WRITE_RAM)
         self.write_data(data)
 
@@ -976,6 +987,8 @@ class Display(object):
 
         Notes: CircuitPython implemntation
         """
+        # A reset returns the address window to its default
+        self._x0 = self._x1 = self._y0 = self._y1 = -1
         self.rst.value = False
         sleep(.05)
         self.rst.value = True
@@ -986,6 +999,8 @@ class Display(object):
 
         Notes: MicroPython implemntation
         """
+        # A reset returns the address window to its default
+        self._x0 = self._x1 = self._y0 = self._y1 = -1
         self.rst(0)
         sleep(.05)
         self.rst(1)
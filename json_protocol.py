@@ -16,6 +16,17 @@ class MessageType:
     ERROR = "error"
 
 
+# Numeric message type codes sent by the PC service
+_TYPE_NAMES = {
+    1: MessageType.COMMAND,
+    2: MessageType.SYSTEM_DATA,
+    3: MessageType.STATUS,
+    4: MessageType.ACK,
+    5: MessageType.HEARTBEAT,
+    6: MessageType.ERROR
+}
+
+
 class CommandType:
     """Command type constants"""
     INIT = "INIT"
@@ -78,6 +89,11 @@ class JSONProtocol:
             if "type" not in parsed:
                 return None
             
+            # Map numeric type codes back onto the type names
+            msg_type = parsed["type"]
+            if isinstance(msg_type, int):
+                parsed["type"] = _TYPE_NAMES.get(msg_type, msg_type)
+            
             return parsed
             
         except (ValueError, TypeError):
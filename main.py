@@ -7,11 +7,31 @@ import gc
 import sys
 import select
 from display import DisplayManager
-from button import Button, ButtonManager, ButtonColors
+from button import (Button, ButtonManager, BUTTON_TEXT, BUTTON_BG, BUTTON_BORDER,
+                    WHITE, RED, GREEN, YELLOW, CYAN, MAGENTA)
 from audio import AudioManager
 # Serial communication handled through USB debug channel only
 from json_protocol import extract_system_data, extract_ack_info, MessageType
 
+# Most characters taken from USB per main-loop pass; enough for several
+# frames while keeping touch handling responsive
+USB_READ_BUDGET = 512
+
+# The info panel's data changes every few seconds, so it is refreshed on a
+# timer rather than from touch or message handling
+SYSTEM_INFO_INTERVAL_MS = 1000
+
+# Seconds without system data before the PC is shown as gone
+SYSTEM_DATA_TIMEOUT = 30.0
+
+# Status line value and color for fresh / stale system data
+_STATUS_CONNECTED = ("Connected", GREEN)
+_STATUS_NO_DATA = ("No Data", RED)
+
+# Trace output for development. stdout is also the link to the PC, so
+# every trace line costs USB bandwidth and main-loop time
+DEBUG = False
+
 
 class CYDApplication:
     """Main application class for ESP32 CYD with PC communication"""
@@ -55,6 +75,8 @@ class CYDApplication:
         self.current_menu = "main"
         self.menu_stack = []  # For navigation history
         self.show_system_info = False
+        self._sysinfo_drawn = None  # Value strings on screen per info line
+        self._last_info_draw = None  # ticks_ms of last panel refresh; None = due
         
         # Menu definitions
         self.menus = {
@@ -68,7 +90,7 @@ class CYDApplication:
         
     def create_menu_buttons(self):
         """Create buttons for the current menu"""
-        self.button_manager.buttons.clear()  # Clear existing buttons
+        self.button_manager.clear()  # Clear existing buttons
         
         menu_items = self.menus.get(self.current_menu, [])
         
@@ -77,25 +99,29 @@ class CYDApplication:
             available_height = 40  # Fixed 40px total for both buttons (20px each)
             self.button_manager.create_full_width_buttons(
                 self.width, available_height, menu_items,
-                ButtonColors.BUTTON_TEXT, ButtonColors.BUTTON_BG, ButtonColors.BUTTON_BORDER
+                BUTTON_TEXT, BUTTON_BG, BUTTON_BORDER
             )
         else:
             # Use full screen for buttons
             self.button_manager.create_full_width_buttons(
                 self.width, self.height, menu_items,
-                ButtonColors.BUTTON_TEXT, ButtonColors.BUTTON_BG, ButtonColors.BUTTON_BORDER
+                BUTTON_TEXT, BUTTON_BG, BUTTON_BORDER
             )
         
         # Set button callbacks
         for button in self.button_manager.buttons:
             button.set_callback(self.handle_menu_button_press)
         
-        print(f"Created {len(menu_items)} buttons for menu: {self.current_menu}")
+        if DEBUG:
+            print(f"Created {len(menu_items)} buttons for menu: {self.current_menu}")
     
     def handle_menu_button_press(self, button):
         """Handle menu button press"""
         button_text = button.text
-        print(f"Menu button pressed: {button_text}")
+        if DEBUG:
+            print(f"Menu button pressed: {button_text}")
+        
+        layout = (self.current_menu, self.show_system_info)
         
         # Audio feedback
         self.audio_manager.play_button_click_tone()
@@ -120,16 +146,22 @@ class CYDApplication:
             self.menu_stack.clear()  # Clear navigation history
             self.show_system_info = False
             self.create_menu_buttons()
-            print("Navigated back to main menu")
+            if DEBUG:
+                print("Navigated back to main menu")
         elif button_text in ["Browser", "Terminal", "Shutdown"]:
             self.execute_pc_command(button_text)
         elif button_text in ["Alarm", "Car", "Bell", "Dog", "Police", "Tick", "Modem", "Applause"]:
             self.execute_sound_command(button_text)
         elif button_text in ["Calibrate", "WIFI"]:
-            print(f"{button_text} functionality will be implemented in the future")
+            if DEBUG:
+                print(f"{button_text} functionality will be implemented in the future")
         
-        # Redraw interface
-        self.draw_interface()
+        # Redraw interface; without a menu change only the released
+        # button needs repainting
+        if (self.current_menu, self.show_system_info) == layout:
+            self.draw_interface(dirty=(button,))
+        else:
+            self.draw_interface()
     
     def navigate_to_menu(self, menu_name):
         """Navigate to a specific menu"""
@@ -139,7 +171,8 @@ class CYDApplication:
             if menu_name != "system":
                 self.show_system_info = False
             self.create_menu_buttons()
-            print(f"Navigated to menu: {menu_name}")
+            if DEBUG:
+                print(f"Navigated to menu: {menu_name}")
     
     def navigate_back(self):
         """Navigate back to previous menu"""
@@ -147,8 +180,9 @@ class CYDApplication:
             self.current_menu = self.menu_stack.pop()
             self.show_system_info = False
             self.create_menu_buttons()
-            print(f"Navigated back to menu: {self.current_menu}")
-        else:
+            if DEBUG:
+                print(f"Navigated back to menu: {self.current_menu}")
+        elif DEBUG:
             print("Already at main menu")
     
     def execute_pc_command(self, command):
@@ -161,12 +195,14 @@ class CYDApplication:
         
         pc_command = command_map.get(command, command.upper())
         print(f"PC_COMMAND:{pc_command}")
-        print(f"Command {command} sent to PC")
+        if DEBUG:
+            print(f"Command {command} sent to PC")
     
     def execute_sound_command(self, sound_name):
         """Execute sound command via USB debug output"""
         print(f"PC_SOUND:{sound_name}")
-        print(f"Sound {sound_name} sent to PC")
+        if DEBUG:
+            print(f"Sound {sound_name} sent to PC")
         
     def init_hardware(self):
         """Initialize all hardware components"""
@@ -194,83 +230,40 @@ class CYDApplication:
     def handle_pc_message(self, message, is_json):
         """Handle messages received from PC"""
         # Debug: Echo all received messages
-        print(f"RECEIVED: {'JSON' if is_json else 'TEXT'}: {message}")
+        if DEBUG:
+            print(f"RECEIVED: {'JSON' if is_json else 'TEXT'}: {message}")
         
         if is_json:
             message_type = message.get("type")
-            print(f"JSON Message Type: {message_type}")
+            if DEBUG:
+                print(f"JSON Message Type: {message_type}")
             
             if message_type == MessageType.SYSTEM_DATA:
                 # Update system data
                 data = extract_system_data(message)
-                print(f"Extracted system data: {data}")
+                if DEBUG:
+                    print(f"Extracted system data: {data}")
                 if data:
                     self.system_data.update(data)
                     self.last_system_update = time.time()
-                    print("System data updated from JSON")
+                    if DEBUG:
+                        print("System data updated from JSON")
                     
             elif message_type == MessageType.ACK:
                 # Handle command acknowledgment
                 command, result, details = extract_ack_info(message)
-                print(f"Command {command} result: {result}")
-                if details:
+                if DEBUG:
+                    print(f"Command {command} result: {result}")
+                if DEBUG and details:
                     print(f"Details: {details}")
                     
             elif message_type == MessageType.STATUS:
                 state = message.get("state")
-                print(f"PC Status: {state}")
+                if DEBUG:
+                    print(f"PC Status: {state}")
         else:
-            # Non-JSON message (debug output) - check for data messages
-            if message.startswith("ESP32_DATA:"):
-                print(f"Found ESP32_DATA message: {message}")
-                if self.parse_esp32_data(message):
-                    return  # Successfully parsed data, don't print as debug
-            elif message.startswith("PC_SYSTEM_DATA:"):
-                print(f"Found PC_SYSTEM_DATA message: {message}")
-                if self.parse_debug_system_data(message):
-                    return  # Successfully parsed data, don't print as debug
             print(f"PC: {message}")
     
-    def parse_esp32_data(self, debug_message):
-        """Parse system data from ESP32_DATA debug output"""
-        try:
-            if debug_message.startswith("ESP32_DATA:"):
-                json_str = debug_message.split("ESP32_DATA:")[1].strip()
-                # Try to parse the JSON using the same method as regular messages
-                from json_protocol import parse_message
-                message = parse_message(json_str)
-                
-                if message and message.get("type") == MessageType.SYSTEM_DATA:
-                    data = extract_system_data(message)
-                    if data:
-                        self.system_data.update(data)
-                        self.last_system_update = time.time()
-                        print("System data updated from ESP32_DATA")
-                        return True
-        except Exception as e:
-            print(f"Error parsing ESP32_DATA: {e}")
-        return False
-    
-    def parse_debug_system_data(self, debug_message):
-        """Parse system data from debug output"""
-        try:
-            if debug_message.startswith("PC_SYSTEM_DATA:"):
-                json_str = debug_message.split("PC_SYSTEM_DATA:")[1].strip()
-                # Try to parse the JSON using the same method as regular messages
-                from json_protocol import parse_message
-                message = parse_message(json_str)
-                
-                if message and message.get("type") == MessageType.SYSTEM_DATA:
-                    data = extract_system_data(message)
-                    if data:
-                        self.system_data.update(data)
-                        self.last_system_update = time.time()
-                        print("System data updated from PC_SYSTEM_DATA")
-                        return True
-        except Exception as e:
-            print(f"Error parsing PC_SYSTEM_DATA: {e}")
-        return False
-    
     def reset_system_data(self):
         """Reset system data to show no data available"""
         self.system_data = {
@@ -291,59 +284,87 @@ class CYDApplication:
         else:
             print("Disconnected from PC")
     
-    def draw_interface(self):
-        """Draw the complete user interface"""
-        # Clear display
-        self.display_manager.clear_screen()
-        
-        # Draw menu buttons
+    def draw_interface(self, dirty=None):
+        """Draw the complete user interface, or only the dirty buttons"""
+        if dirty is not None:
+            # Each button fills its own rectangle, so nothing else is touched
+            for button in dirty:
+                button.draw(self.display)
+            return
+        
+        # Draw menu buttons; they are full-width rows from the top and paint
+        # their own rectangles, so only the area below them needs clearing
+        buttons = self.button_manager.buttons
         self.button_manager.draw_all(self.display)
-        
-        # Draw system information if in system menu
-        if self.current_menu == "system" and self.show_system_info:
-            self.draw_system_info()
+        covered = buttons[-1].y + buttons[-1].height if buttons else 0
+        if covered < self.height:
+            self.display.fill_rectangle(0, covered, self.width,
+                                        self.height - covered, 0)
+        
+        # That clear wiped the system info, labels included; the next tick
+        # redraws it
+        self._sysinfo_drawn = None
+        self._last_info_draw = None
+    
+    def tick(self, now_ms):
+        """Refresh the system info panel, at most once per SYSTEM_INFO_INTERVAL_MS"""
+        if not (self.current_menu == "system" and self.show_system_info):
+            return
+        last = self._last_info_draw
+        if last is not None and time.ticks_diff(now_ms, last) < SYSTEM_INFO_INTERVAL_MS:
+            return
+        self._last_info_draw = now_ms
+        self.draw_system_info()
     
     def draw_system_info(self):
-        """Draw system information received from PC in bottom half of screen"""
+        """Draw system information received from PC in bottom half of screen
+        
+        Labels are drawn once after the screen is cleared; afterwards only
+        values that differ from what is on screen are redrawn
+        """
         # Start drawing in the bottom half of the screen
         y = self.height // 2 + 10
         line_height = 16
+        data = self.system_data
         
-        # Connection status
-        current_time = time.time()
-        data_is_fresh = (self.last_system_update > 0 and 
-                        current_time - self.last_system_update < 30.0)
-        
-        if data_is_fresh:
-            status_text = "Status: Connected"
-            status_color = 0x07E0  # Green
+        # Connection status: one freshness check gives both text and color
+        last_update = self.last_system_update
+        if last_update > 0 and time.time() - last_update < SYSTEM_DATA_TIMEOUT:
+            status_text, status_color = _STATUS_CONNECTED
         else:
-            status_text = "Status: No Data"
-            status_color = 0xF800  # Red
-        
-        self.display.draw_text8x8(10, y, status_text, status_color)
-        y += line_height
-        
-        # Date and Time
-        self.display.draw_text8x8(10, y, f"Date: {self.system_data['date']}", 0xFFFF)
-        y += line_height
-        self.display.draw_text8x8(10, y, f"Time: {self.system_data['time']}", 0xFFFF)
-        y += line_height
-        
-        # CPU Usage
-        cpu_text = f"CPU: {self.system_data['cpu_percent']:.1f}%"
-        self.display.draw_text8x8(10, y, cpu_text, 0xFFE0)  # Yellow
-        y += line_height
-        
-        # RAM Usage
-        ram_text = f"RAM: {self.system_data['ram_used_gb']:.1f}/{self.system_data['ram_total_gb']:.1f}GB"
-        self.display.draw_text8x8(10, y, ram_text, 0x07FF)  # Cyan
-        y += line_height
-        
-        # Network Usage
-        net_text = f"NET: U:{self.system_data['network_sent_mb']:.1f} D:{self.system_data['network_recv_mb']:.1f}MB"
-        self.display.draw_text8x8(10, y, net_text, 0xF81F)  # Magenta
-    
+            status_text, status_color = _STATUS_NO_DATA
+        
+        # (label, value, color) per line; only the values are formatted
+        lines = (
+            ("Status: ", status_text, status_color),
+            ("Date: ", data['date'], WHITE),
+            ("Time: ", data['time'], WHITE),
+            ("CPU: ", f"{data['cpu_percent']:.1f}%", YELLOW),
+            ("RAM: ", f"{data['ram_used_gb']:.1f}/{data['ram_total_gb']:.1f}GB", CYAN),
+            ("NET: ", f"U:{data['network_sent_mb']:.1f} D:{data['network_recv_mb']:.1f}MB", MAGENTA),
+        )
+        
+        drawn = self._sysinfo_drawn
+        if drawn is None:
+            drawn = self._sysinfo_drawn = [None] * len(lines)
+            labels_needed = True
+        else:
+            labels_needed = False
+        
+        for i, (label, value, color) in enumerate(lines):
+            previous = drawn[i]
+            # The status label takes its color from the state, so redraw it too
+            if labels_needed or (i == 0 and value != previous):
+                self.display.draw_text8x8(10, y, label, color)
+            if value != previous:
+                value_x = 10 + len(label) * 8
+                # Erase whatever the shorter new value leaves uncovered
+                if previous and len(previous) > len(value):
+                    self.display.fill_rectangle(value_x + len(value) * 8, y,
+                                                (len(previous) - len(value)) * 8, 8, 0)
+                self.display.draw_text8x8(value_x, y, value, color)
+                drawn[i] = value
+            y += line_height
     
     def check_touch_input(self):
         """Check for touch input and handle menu button presses"""
@@ -351,15 +372,22 @@ class CYDApplication:
         if self.display_manager.is_touched():
             touch_detected = True
             x, y = self.display_manager.get_touch_coordinates()
-            print(f"Touch detected at: ({x}, {y})")
+            if DEBUG:
+                print(f"Touch detected at: ({x}, {y})")
             
             # Use button manager to handle touch - need both down and up for proper click
             pressed_button = self.button_manager.handle_touch_down(x, y)
             if pressed_button:
-                print(f"Button pressed: {pressed_button.text}")
+                if DEBUG:
+                    print(f"Button pressed: {pressed_button.text}")
+                # Show the pressed state; the click handler repaints it
+                self.draw_interface(dirty=(pressed_button,))
                 # Immediately handle touch up for simple click behavior
                 clicked_button = self.button_manager.handle_touch_up(x, y)
-                if clicked_button:
+                if clicked_button is None:
+                    # Released without a click, so no handler repaints it
+                    self.draw_interface(dirty=(pressed_button,))
+                elif DEBUG:
                     print(f"Button clicked: {clicked_button.text}")
             
             # Reset touch idle counter when touch is detected
@@ -373,53 +401,63 @@ class CYDApplication:
     def check_usb_input_nonblocking(self):
         """Non-blocking USB input using brace-based JSON message parsing with smart buffer management"""
         try:
-            # Check if ANY data is available (no blocking)
-            if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-                # Read single character (non-blocking)
+            # Drain everything already received (no blocking), up to a
+            # budget, instead of taking one character per main-loop pass
+            budget = USB_READ_BUDGET
+            while budget and sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
+                budget -= 1
                 char = sys.stdin.read(1)
-                if char:
-                    if char == '{':
-                        # Improved buffer management - don't lose substantial data
-                        if len(self.serial_buffer) > 50:
-                            print(f"WARNING: New message started before completion: {self.serial_buffer[:100]}...")
-                            # Try to salvage partial message if it looks like valid JSON start
-                            if self.serial_buffer.startswith('{"type":'):
-                                print("Attempting to salvage partial message")
-                                # Queue partial message for debugging
-                                self.message_queue.append(f"PARTIAL: {self.serial_buffer}")
-                        
-                        # Start new message
-                        self.serial_buffer = '{'
+                if not char:
+                    break
+                
+                if char == '{':
+                    # Improved buffer management - don't lose substantial data
+                    if len(self.serial_buffer) > 50:
+                        print(f"WARNING: New message started before completion: {self.serial_buffer[:100]}...")
+                        # Try to salvage partial message if it looks like valid JSON start
+                        if self.serial_buffer.startswith('{"type":'):
+                            print("Attempting to salvage partial message")
+                            # Queue partial message for debugging
+                            self.message_queue.append(f"PARTIAL: {self.serial_buffer}")
+                    
+                    # Start new message
+                    self.serial_buffer = '{'
+                    if DEBUG:
                         print("JSON_START: New message started")
-                        
-                    elif char == '}':
-                        # End of JSON message - complete it
-                        self.serial_buffer += '}'
+                    
+                elif char == '}':
+                    # End of JSON message - complete it
+                    self.serial_buffer += '}'
+                    if DEBUG:
                         print(f"JSON_END: Message completed ({len(self.serial_buffer)} chars)")
-                        
-                        # Validate and queue complete JSON message
-                        if self.is_valid_json(self.serial_buffer):
-                            self.message_queue.append(self.serial_buffer)
+                    
+                    # Validate and queue complete JSON message
+                    if self.is_valid_json(self.serial_buffer):
+                        self.message_queue.append(self.serial_buffer)
+                        if DEBUG:
                             print(f"QUEUED_MESSAGE: {self.serial_buffer}")
-                        else:
-                            print(f"INVALID_JSON: {self.serial_buffer}")
-                        
-                        # Clear buffer for next message
-                        self.serial_buffer = ""
-                        
                     else:
-                        # Add character to current message (only if we have started with '{')
-                        if self.serial_buffer.startswith('{'):
-                            self.serial_buffer += char
-                        # Ignore characters outside of JSON messages
-                        
-                    # Prevent buffer overflow
-                    if len(self.serial_buffer) > 2000:
-                        print("Serial buffer overflow, clearing")
-                        self.serial_buffer = ""
+                        print(f"INVALID_JSON: {self.serial_buffer}")
+                    
+                    # Clear buffer for next message
+                    self.serial_buffer = ""
+                    
+                else:
+                    # Add character to current message (only if we have started with '{')
+                    if self.serial_buffer.startswith('{'):
+                        self.serial_buffer += char
+                    # Ignore characters outside of JSON messages
+                    
+                # Prevent buffer overflow
+                if len(self.serial_buffer) > 2000:
+                    print("Serial buffer overflow, clearing")
+                    self.serial_buffer = ""
+            
+            # Characters consumed this pass
+            return USB_READ_BUDGET - budget
         except Exception as e:
             # Ignore errors - stdin might not be available in all environments
-            pass
+            return 0
     
     def is_valid_json(self, text):
         """Check if text is valid JSON"""
@@ -435,7 +473,8 @@ class CYDApplication:
         
         while self.message_queue:
             message = self.message_queue.pop(0)
-            print(f"PROCESSING: {message}")
+            if DEBUG:
+                print(f"PROCESSING: {message}")
             
             # Check for direct JSON messages first
             if message.startswith('{"type":'):
@@ -448,37 +487,28 @@ class CYDApplication:
                             self.system_data.update(data)
                             self.last_system_update = time.time()
                             ui_needs_update = True
-                            print("System data updated from direct JSON")
+                            if DEBUG:
+                                print("System data updated from direct JSON")
                             continue
                 except Exception as e:
                     print(f"Error parsing direct JSON: {e}")
             
-            # Check for prefixed system data messages
-            if message.startswith("PC_SYSTEM_DATA:"):
-                print(f"Found PC_SYSTEM_DATA message: {message}")
-                if self.parse_debug_system_data(message):
-                    ui_needs_update = True
-            elif message.startswith("ESP32_DATA:"):
-                print(f"Found ESP32_DATA message: {message}")
-                if self.parse_esp32_data(message):
-                    ui_needs_update = True
-            else:
-                # Handle other messages
+            if DEBUG:
                 print(f"PC_MESSAGE: {message}")
         
-        # Update UI only if we received new system data
-        if ui_needs_update and self.current_menu == "system" and self.show_system_info:
-            print("UI update triggered by new system data")
-            self.draw_interface()
-        
+        # The info panel picks up new system data on its next tick
         return ui_needs_update
     
     def update_communication(self):
-        """Update communication status with non-blocking USB checks"""
+        """Update communication status with non-blocking USB checks
+        
+        Returns True if USB input was received, so the caller can come
+        straight back for the rest of a burst
+        """
         current_time = time.time()
         
         # Non-blocking character reading (very fast)
-        self.check_usb_input_nonblocking()
+        received = self.check_usb_input_nonblocking()
         
         # Process any complete messages in queue
         self.process_message_queue()
@@ -488,6 +518,8 @@ class CYDApplication:
             print(f"Communication status: USB_Debug=True, Last_data={current_time - self.last_system_update:.1f}s ago")
             print(f"Buffer: '{self.serial_buffer}', Queue: {len(self.message_queue)} messages")
             self.last_heartbeat = current_time
+        
+        return received > 0
     
     def run(self):
         """Main application loop"""
@@ -513,15 +545,22 @@ class CYDApplication:
                 touch_detected = self.check_touch_input()
                 
                 # Priority 2: Only check serial communication when touch is idle
+                usb_busy = False
                 if not touch_detected and self.touch_idle_counter > 5:  # After 5 loops without touch
-                    self.update_communication()
-                    self.touch_idle_counter = 0  # Reset counter after checking serial
+                    usb_busy = self.update_communication()
+                    # While input keeps arriving the counter stays up, so the
+                    # next pass reads again right after its touch check
+                    if not usb_busy:
+                        self.touch_idle_counter = 0  # Reset counter after checking serial
                 
-                # UI updates are now handled only when new data arrives in process_message_queue()
-                # No periodic UI updates - makes communication more robust
+                # Priority 3: timed info panel refresh; only values that
+                # changed reach the display
+                self.tick(time.ticks_ms())
                 
-                # Reduced delay for faster touch response
-                time.sleep(0.01)  # 10ms for fast touch response
+                # Reduced delay for faster touch response; skipped while USB
+                # data is streaming in so a burst is drained back to back
+                if not usb_busy:
+                    time.sleep(0.01)  # 10ms for fast touch response
                 
                 # Periodic garbage collection
                 if time.ticks_ms() % 10000 < 50:  # Every ~10 seconds